@@ -2,12 +2,13 @@ import sys
 import os
 import sqlite3
 import time
-import subprocess
 import warnings
-from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QListWidget, QVBoxLayout, QWidget, QComboBox, \
+from PyQt5.QtWidgets import QApplication, QMainWindow, QPushButton, QListView, QVBoxLayout, QWidget, QComboBox, \
     QFileDialog, QHBoxLayout, QSizePolicy, QMessageBox, QMenu, QAction, QDialog, QLabel, QWhatsThis, QDialogButtonBox
-from PyQt5.QtCore import Qt, QPoint
+from PyQt5.QtCore import Qt, QPoint, QAbstractListModel, QModelIndex
 from PyQt5.QtGui import QIcon, QFont
+from file_tracker.launcher import FolderLauncher
+from file_tracker.sorted_model import SortedPathModel
 
 # 忽略 DeprecationWarning 警告
 warnings.filterwarnings("ignore", category=DeprecationWarning)
@@ -38,6 +39,9 @@ CREATE TABLE IF NOT EXISTS paths (
 ''')
 conn.commit()
 
+# 在后台打开资源管理器，连续双击只打开一次
+launcher = FolderLauncher()
+
 class CustomFileDialog(QFileDialog):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -70,6 +74,55 @@ class CustomFileDialog(QFileDialog):
     def selectCurrentFolder(self):
         self.done(QFileDialog.Accepted)
 
+# 路径列表模型：只对变化的行发出信号，不再整表重建
+class PathListModel(QAbstractListModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.paths = SortedPathModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.paths)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self.paths.path_at(index.row())
+        return None
+
+    def reload(self, rows, order_by):
+        self.beginResetModel()
+        self.paths.order_by = order_by
+        self.paths.load(rows)
+        self.endResetModel()
+
+    def set_order(self, order_by):
+        self.layoutAboutToBeChanged.emit()
+        self.paths.set_order(order_by)
+        self.layoutChanged.emit()
+
+    def update_path(self, path, access_count, last_access_time):
+        old_row, new_row = self.paths.position_for(path, access_count, last_access_time)
+        if old_row == -1:
+            self.beginInsertRows(QModelIndex(), new_row, new_row)
+            self.paths.update(path, access_count, last_access_time)
+            self.endInsertRows()
+            return
+        if old_row != new_row:
+            # 向下移动时目标位置是移动前的行号，需要加一
+            destination = new_row + 1 if new_row > old_row else new_row
+            self.beginMoveRows(QModelIndex(), old_row, old_row, QModelIndex(), destination)
+            self.paths.update(path, access_count, last_access_time)
+            self.endMoveRows()
+        else:
+            self.paths.update(path, access_count, last_access_time)
+        self.dataChanged.emit(self.index(new_row), self.index(new_row))
+
+    def remove_path(self, path):
+        row = self.paths.row_of(path)
+        if row != -1:
+            self.beginRemoveRows(QModelIndex(), row, row)
+            self.paths.remove(path)
+            self.endRemoveRows()
+
 # PyQt主窗口类
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -86,18 +139,21 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(self.central_widget)
 
         # 文件夹列表
-        self.folder_list = QListWidget(self)
+        self.folder_model = PathListModel(self)
+        self.folder_list = QListView(self)
+        self.folder_list.setModel(self.folder_model)
+        self.folder_list.setUniformItemSizes(True)  # 行高一致，大量路径时无需逐行测量
         font = QFont("微软雅黑", 11)  # 稍微放大字体
         self.folder_list.setFont(font)
         self.layout.addWidget(self.folder_list)
-        self.folder_list.itemDoubleClicked.connect(self.open_selected_folder)
+        self.folder_list.doubleClicked.connect(self.open_selected_folder)
         self.folder_list.setContextMenuPolicy(Qt.CustomContextMenu)
         self.folder_list.customContextMenuRequested.connect(self.show_context_menu)
 
         # 排序选项
         self.sort_option = QComboBox(self)
         self.sort_option.addItems(["频次", "时间"])
-        self.sort_option.currentIndexChanged.connect(self.update_folder_list)
+        self.sort_option.currentIndexChanged.connect(self.change_sort_order)
         self.sort_option.setSizePolicy(QSizePolicy.Minimum, QSizePolicy.Fixed)
         self.sort_option.setFixedHeight(30)  # 设置固定高度，使其与其他按钮一致
         self.sort_option.setFont(QFont("微软雅黑", 10))  # 设置字体大小
@@ -159,8 +215,7 @@ class MainWindow(QMainWindow):
                 folder_selected = selected
             folder_selected = os.path.normpath(folder_selected)  # 规范化路径
             self.record_accessed_path(folder_selected)
-            self.update_folder_list()
-            subprocess.Popen(f'explorer "{folder_selected}"')  # 打开资源管理器
+            launcher.open(folder_selected)  # 打开资源管理器
 
     def record_accessed_path(self, folder_path):
         if folder_path:
@@ -175,38 +230,35 @@ class MainWindow(QMainWindow):
                 cursor.execute("INSERT INTO paths (path, access_count, last_access_time) VALUES (?, 1, ?)",
                                (folder_path, current_time))
             conn.commit()
+            access_count = result[2] + 1 if result else 1
+            self.folder_model.update_path(folder_path, access_count, current_time)  # 只移动这一行
 
-    def update_folder_list(self):
-        # 清空文件夹列表
-        self.folder_list.clear()
+    def sort_order(self):
+        return 'access_count' if self.sort_option.currentText() == "频次" else 'last_access_time'
 
-        # 根据排序选项更新列表
-        sort_by = self.sort_option.currentText()
-        if sort_by == "频次":
-            cursor.execute("SELECT path FROM paths ORDER BY access_count DESC")
-        else:
-            cursor.execute("SELECT path FROM paths ORDER BY last_access_time DESC")
+    def change_sort_order(self):
+        self.folder_model.set_order(self.sort_order())
 
+    def update_folder_list(self):
+        # 从数据库整体载入，仅在启动和清空时使用
+        cursor.execute("SELECT path, access_count, last_access_time FROM paths")
         folders = cursor.fetchall()
-        if folders:
-            for folder in folders:
-                self.folder_list.addItem(folder[0])
-        else:
+        self.folder_model.reload(folders, self.sort_order())
+        if not folders:
             if not self.is_first_time:  # 仅在点击清空时显示提示
                 pass  # 移除 show_cleared_message 的调用
             self.is_first_time = False  # 重置首次标记
 
-    def open_selected_folder(self, item):
-        folder_path = item.text()
+    def open_selected_folder(self, index):
+        folder_path = index.data()
         if folder_path:
             folder_path = os.path.normpath(folder_path)  # 规范化路径
             # 检查路径是否存在
             if os.path.exists(folder_path):
-                subprocess.Popen(f'explorer "{folder_path}"')
+                launcher.open(folder_path)
                 self.record_accessed_path(folder_path)
-                self.update_folder_list()
             else:
-                self.delete_selected_path(item)  # 如果路径不存在，删除记录并弹窗提醒
+                self.delete_selected_path(index)  # 如果路径不存在，删除记录并弹窗提醒
                 # 创建自定义 QDialog 对象
                 dialog = QDialog(self)
                 dialog.setWindowTitle("路径失效")
@@ -233,9 +285,9 @@ class MainWindow(QMainWindow):
 
     def show_context_menu(self, pos: QPoint):
         # 获取右键点击的项目
-        item = self.folder_list.itemAt(pos)
+        item = self.folder_list.indexAt(pos)
 
-        if item:
+        if item.isValid():
             try:
                 menu = QMenu(self)
 
@@ -257,7 +309,7 @@ class MainWindow(QMainWindow):
 
                 if action == copy_action:
                     clipboard = QApplication.clipboard()
-                    clipboard.setText(item.text())  # 复制路径到剪贴板
+                    clipboard.setText(item.data())  # 复制路径到剪贴板
                 elif action == delete_action:
                     self.delete_selected_path(item)
 
@@ -266,10 +318,10 @@ class MainWindow(QMainWindow):
 
     def delete_selected_path(self, item):
         # 删除数据库中的记录
-        folder_path = item.text()
+        folder_path = item.data()
         cursor.execute("DELETE FROM paths WHERE path=?", (folder_path,))
         conn.commit()
-        self.update_folder_list()
+        self.folder_model.remove_path(folder_path)
 
     def show_cleared_message(self):
         msg_box = QMessageBox(self)
@@ -1,10 +1,27 @@
 import wx
 import os
 import sqlite3
-import subprocess
 import json
 import ctypes
+import sys
+import threading
 from datetime import datetime
+from file_tracker.backup import BackupScheduler, restore_latest
+from file_tracker.canonical import canonical_path, is_below, path_key
+from file_tracker.dir_cache import DirectoryLister
+from file_tracker.history_io import export_history, import_history
+from file_tracker.importer import import_recent
+from file_tracker.instance import InstanceServer, instance_file, notify_running
+from file_tracker.launcher import FolderLauncher
+from file_tracker.metadata import MetadataCache, file_type, format_mtime, format_size
+from file_tracker.path_trie import PathTrie
+from file_tracker.retention import Evictor, RetentionPolicy
+from file_tracker.transitions import TransitionModel
+from file_tracker.stall import StallMonitor, is_enabled
+from file_tracker.sync import HistorySync
+from file_tracker.storage import TIME_FORMAT, connect, get_db_path, rename_path_prefix, set_pinned, upsert_paths
+from file_tracker.trace import TraceRecorder
+from file_tracker.watcher import PathWatcher
 
 class CustomBitmapButton(wx.Panel):
     def __init__(self, parent, bitmap, size):
@@ -88,7 +105,299 @@ class CustomButton(wx.Button):
         self.Refresh()
         event.Skip()
 
+class BrowserTree(wx.Panel):
+    """异步枚举目录的浏览树，提供 FileTracker 用到的 wx.GenericDirCtrl 接口
+
+    子节点在线程池中用 os.scandir 枚举，结果分块插入树中，避免展开大目录时界面卡死。
+    已加载的节点再次展开时重新枚举，并与现有子节点调和。
+    """
+    CHUNK_SIZE = 200  # 每次事件循环插入的节点数
+
+    def __init__(self, parent, lister, dir=None, on_populated=None):
+        super().__init__(parent)
+        self.lister = lister
+        self.on_populated = on_populated
+        self.show_hidden = True
+        self._loading = {}  # 路径 -> 正在枚举的节点
+        self._targets = {}  # 待恢复的路径 -> {'expand', 'select', 'anchor'} 中的若干动作
+        self._anchor = None  # (锚点节点, 行偏移)
+        self._filling = 0  # 正在分块插入子节点的目录数
+        self._shown = {}  # 路径 -> 已填充到树中的条目列表，再次展开时据此判断是否需要调和
+        self._stale = set()  # 用未经确认的缓存填充、填充完成后需要在后台确认的路径
+
+        self.tree = wx.TreeCtrl(self, style=wx.TR_DEFAULT_STYLE | wx.TR_HIDE_ROOT | wx.TR_MULTIPLE | wx.TR_LINES_AT_ROOT | wx.BORDER_NONE)
+        images = wx.ImageList(16, 16)
+        self.drive_image = images.Add(wx.ArtProvider.GetBitmap(wx.ART_HARDDISK, wx.ART_OTHER, (16, 16)))
+        self.folder_image = images.Add(wx.ArtProvider.GetBitmap(wx.ART_FOLDER, wx.ART_OTHER, (16, 16)))
+        self.file_image = images.Add(wx.ArtProvider.GetBitmap(wx.ART_NORMAL_FILE, wx.ART_OTHER, (16, 16)))
+        self.tree.AssignImageList(images)
+        self.tree.Bind(wx.EVT_TREE_ITEM_EXPANDING, self.on_expanding)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        sizer.Add(self.tree, 1, wx.EXPAND)
+        self.SetSizer(sizer)
+
+        root = self.tree.AddRoot('')
+        for volume in self.list_volumes():
+            item = self.tree.AppendItem(root, volume, self.drive_image, data=volume)
+            self.tree.SetItemHasChildren(item, True)
+        if dir:
+            self.ExpandPath(dir)
+
+    @staticmethod
+    def list_volumes():
+        if 'wxMSW' in wx.PlatformInfo:
+            drives = ctypes.windll.kernel32.GetLogicalDrives()
+            return [f"{chr(ord('A') + i)}:\\" for i in range(26) if drives >> i & 1]
+        return ['/']
+
+    def GetTreeCtrl(self):
+        return self.tree
+
+    def ShowHidden(self, show):
+        self.show_hidden = show
+
+    def GetPath(self, item=None):
+        if item is None:
+            item = self.tree.GetFocusedItem()
+        if not item.IsOk():
+            return ''
+        return self.tree.GetItemData(item) or ''
+
+    def GetPaths(self):
+        return [self.tree.GetItemData(item) for item in self.tree.GetSelections() if self.tree.GetItemData(item)]
+
+    @staticmethod
+    def _key(path):
+        return path_key(path)
+
+    def ExpandPath(self, path):
+        # 逐级展开到目标路径并选中，未加载的层级在枚举完成后继续
+        self._targets.setdefault(self._key(path), set()).add('select')
+        self._continue_expand(self.tree.GetRootItem())
+
+    def GetState(self):
+        """返回浏览状态快照：最深一层的展开节点，以及锚点路径和它距视图顶部的行数"""
+        expanded = []
+
+        def walk(item):
+            child, cookie = self.tree.GetFirstChild(item)
+            while child.IsOk():
+                if self.tree.IsExpanded(child) and self.GetPath(child):
+                    count = len(expanded)
+                    walk(child)
+                    if len(expanded) == count:  # 子孙都未展开时才需要记录自身
+                        expanded.append(self.GetPath(child))
+                child, cookie = self.tree.GetNextChild(item, cookie)
+        walk(self.tree.GetRootItem())
+
+        first = self.tree.GetFirstVisibleItem()
+        anchor, offset = first, 0
+        selections = self.tree.GetSelections()
+        if selections and first.IsOk():
+            item = first
+            for row in range(200):
+                if not item.IsOk():
+                    break
+                if item == selections[0]:
+                    anchor, offset = item, row
+                    break
+                item = self.tree.GetNextVisible(item)
+        return {'expanded': expanded,
+                'anchor': self.GetPath(anchor) if anchor.IsOk() else '',
+                'offset': offset}
+
+    def RestoreState(self, state):
+        """按快照懒加载展开节点，锚点出现且全部展开完成后一次滚动到位"""
+        for path in state.get('expanded', []):
+            self._targets.setdefault(self._key(path), set()).add('expand')
+        if state.get('anchor'):
+            self._targets.setdefault(self._key(state['anchor']), set()).add('anchor')
+            self._anchor = (None, state.get('offset', 0))
+        self._continue_expand(self.tree.GetRootItem())
+
+    def ResetHorizontalScroll(self):
+        if self.tree.GetScrollPos(wx.HORIZONTAL) == 0:
+            return
+        if 'wxMSW' in wx.PlatformInfo:
+            ctypes.windll.user32.SendMessageW(self.tree.GetHandle(), 0x0114, 6, 0)  # WM_HSCROLL, SB_LEFT
+        else:
+            self.tree.SetScrollPos(wx.HORIZONTAL, 0)
+
+    def _continue_expand(self, parent):
+        if self._targets:
+            found = []
+            child, cookie = self.tree.GetFirstChild(parent)
+            while child.IsOk():
+                if self.tree.GetItemData(child) is not None:
+                    found.append(self._key(self.GetPath(child)))
+                    self._visit(child)
+                child, cookie = self.tree.GetNextChild(parent, cookie)
+            # 父节点已加载完却找不到的目标路径已不存在，直接放弃
+            parent_key = self._key(self.GetPath(parent)) if self.GetPath(parent) else None
+            for target in list(self._targets):
+                if (parent_key is None or is_below(target, parent_key)) and \
+                        not any(target == key or is_below(target, key) for key in found):
+                    del self._targets[target]
+        self._scroll_to_anchor()
+
+    def _visit(self, item):
+        path = self._key(self.GetPath(item))
+        actions = self._targets.pop(path, ())
+        if 'anchor' in actions:
+            self._anchor = (item, self._anchor[1])
+        if 'select' in actions:
+            self.tree.UnselectAll()
+            self.tree.SelectItem(item)
+        deeper = any(is_below(target, path) for target in self._targets)
+        if deeper or 'expand' in actions:
+            loaded = self.tree.GetChildrenCount(item, False) > 0 and self.GetPath(item) not in self._loading
+            self.tree.Expand(item)  # 未加载时会触发枚举，完成后回到 _continue_expand
+            if loaded and deeper:
+                self._continue_expand(item)
+
+    def _scroll_to_anchor(self):
+        # 全部展开完成后只滚动一次，避免之后插入的节点把锚点挤走
+        if self._anchor is None or self._targets or self._loading or self._filling:
+            return
+        item, offset = self._anchor
+        self._anchor = None
+        if item is not None and item.IsOk():
+            self.tree.ScrollTo(item)
+            if offset:
+                self.tree.ScrollLines(-offset)
+
+    def on_expanding(self, event):
+        item = event.GetItem()
+        path = self.tree.GetItemData(item)
+        if path and path not in self._loading:
+            if self.tree.GetChildrenCount(item, False) == 0:
+                self.load_children(item)
+            elif path in self._shown:
+                self.refresh_children(item)
+        event.Skip()
+
+    def refresh_children(self, item):
+        # 再次展开时在后台重新确认：目录未变时缓存命中且是同一份列表，只需一次 stat，
+        # 网络共享上的 stat 也不会阻塞界面
+        path = self.tree.GetItemData(item)
+        self.lister.submit(path, lambda path, entries, error: wx.CallAfter(self._on_relisted, item, path, entries, error))
+
+    def _on_relisted(self, item, path, entries, error):
+        if item.IsOk() and not error and path in self._shown and entries is not self._shown[path]:
+            self._reconcile(item, entries)
+
+    def _reconcile(self, item, entries):
+        # 只删除消失的节点、插入新出现的节点，已有节点（连同展开的子树）保持不变
+        existing = {}
+        child, cookie = self.tree.GetFirstChild(item)
+        while child.IsOk():
+            existing[self.tree.GetItemData(child)] = child
+            child, cookie = self.tree.GetNextChild(item, cookie)
+        wanted = [entry for entry in entries if self.show_hidden or not entry.is_hidden]
+        paths = {entry.path for entry in wanted}
+        for path, child in existing.items():
+            if path not in paths:
+                self.tree.Delete(child)
+        previous = None
+        for entry in wanted:
+            child = existing.get(entry.path)
+            if child is None:
+                image = self.folder_image if entry.is_dir else self.file_image
+                if previous is None:
+                    child = self.tree.PrependItem(item, entry.name, image, data=entry.path)
+                else:
+                    child = self.tree.InsertItem(item, previous, entry.name, image, data=entry.path)
+                if entry.is_dir:
+                    self.tree.SetItemHasChildren(child, True)
+            previous = child
+        self.tree.SetItemHasChildren(item, bool(wanted))
+        self._shown[self.tree.GetItemData(item)] = entries
+
+    def load_children(self, item):
+        path = self.tree.GetItemData(item)
+        entries = self.lister.peek(path)
+        if entries is not None:
+            # 先用缓存直接填充，填充完成后再在后台确认是否过期
+            self._stale.add(path)
+            self._filling += 1
+            self._append_chunk(item, entries, 0)
+            return
+        self._loading[path] = item
+        self.tree.AppendItem(item, '加载中...')
+        self.lister.submit(path, lambda path, entries, error: wx.CallAfter(self._on_listed, path, entries, error))
+
+    def _on_listed(self, path, entries, error):
+        item = self._loading.pop(path, None)
+        if item is None or not item.IsOk():
+            return
+        self.tree.DeleteChildren(item)
+        if error:
+            self.tree.SetItemHasChildren(item, False)
+            self._continue_expand(item)
+            return
+        self._filling += 1
+        self._append_chunk(item, entries, 0)
+
+    def _append_chunk(self, item, entries, start):
+        if not item.IsOk():
+            self._filling -= 1
+            return
+        end = start + self.CHUNK_SIZE
+        for entry in entries[start:end]:
+            if entry.is_hidden and not self.show_hidden:
+                continue
+            image = self.folder_image if entry.is_dir else self.file_image
+            child = self.tree.AppendItem(item, entry.name, image, data=entry.path)
+            if entry.is_dir:
+                self.tree.SetItemHasChildren(child, True)
+        if end < len(entries):
+            wx.CallAfter(self._append_chunk, item, entries, end)  # 让出事件循环后再插入下一块
+            return
+        self._filling -= 1
+        path = self.tree.GetItemData(item)
+        self._shown[path] = entries
+        if path in self._stale:
+            self._stale.discard(path)
+            self.refresh_children(item)
+        if not entries:
+            self.tree.SetItemHasChildren(item, False)
+        if self.on_populated:
+            self.on_populated(item)
+        self._continue_expand(item)
+
+class GroupByParentDialog(wx.Dialog):
+    def __init__(self, parent, groups):
+        super().__init__(parent, title='按上级目录汇总', size=(800, 500),
+                         style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.SetBackgroundColour(parent.GetBackgroundColour())
+        self.groups = groups
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        self.list_ctrl = wx.ListCtrl(self, style=wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.BORDER_NONE)
+        self.list_ctrl.InsertColumn(0, '上级目录', width=480)
+        self.list_ctrl.InsertColumn(1, '总频次', width=80)
+        self.list_ctrl.InsertColumn(2, '最后访问时间', width=200)
+        for folder, access_count, last_access_time in groups:
+            index = self.list_ctrl.InsertItem(self.list_ctrl.GetItemCount(), folder)
+            self.list_ctrl.SetItem(index, 1, str(access_count))
+            self.list_ctrl.SetItem(index, 2, last_access_time or '')
+        self.list_ctrl.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_item_activated)
+        sizer.Add(self.list_ctrl, 1, wx.EXPAND | wx.ALL, 5)
+        self.SetSizer(sizer)
+
+    def on_item_activated(self, event):
+        path = self.list_ctrl.GetItemText(event.GetIndex())
+        tracker = self.GetParent()
+        if os.path.exists(path):
+            tracker.open_folder(path)
+            tracker.record_accessed_path(path)
+        else:
+            wx.MessageBox(f"路径 '{path}' 已失效。", "路径失效", wx.OK | wx.ICON_INFORMATION)
+
 class FileTracker(wx.Frame):
+    METADATA_COLUMNS = (('大小', 90), ('修改时间', 160), ('类型', 90))   # 第 3 列起的可选列
+
     def __init__(self):
         style = wx.DEFAULT_FRAME_STYLE | wx.WANTS_CHARS
         super().__init__(parent=None, title='File Tracker', style=style)
@@ -101,10 +410,27 @@ class FileTracker(wx.Frame):
         if not os.path.exists(self.app_data_dir):
             os.makedirs(self.app_data_dir)
         self.config_file = os.path.join(self.app_data_dir, "config.json")
-        self.accessed_paths_file = os.path.join(self.app_data_dir, 'accessed_paths.json')
+        self.accessed_paths_file = os.path.join(self.app_data_dir, 'accessed_paths.jsonl')  # 导入导出的默认文件
+        self.backup_dir = os.path.join(self.app_data_dir, 'backups')
         self.init_database()
+        # 其他进程（再次启动、脚本、编辑器）通过本地通道与本实例通信，由本实例统一写入数据库
+        self.instance_server = InstanceServer(instance_file(self.db_path),
+                                              on_raise=lambda: wx.CallAfter(self.raise_window),
+                                              on_records=lambda rows: wx.CallAfter(self.record_external_paths, rows),
+                                              on_pin=lambda path, pinned: wx.CallAfter(self.set_path_pinned, path, pinned))
         self.pinned_paths = self.load_pinned_paths()
+        self.path_trie = self.load_path_trie()
+        self.transitions = TransitionModel()
+        self.transitions.load(self.conn)
+        self.missing_paths = set()
+        self.trace = self.start_trace()
+        # 监视线程的回调需要转回 UI 线程执行
+        self.path_watcher = PathWatcher(lambda *changes: wx.CallAfter(self.apply_path_changes, *changes))
+        self.launcher = FolderLauncher(on_error=lambda path, e: wx.CallAfter(wx.LogError, f"无法打开文件夹 '{path}': {e}"))
+        self.metadata = MetadataCache()
+        self.show_metadata = self.load_show_metadata()
         self.last_directory = self.load_last_directory()
+        self.evictor = self.create_evictor()
         self.set_icon("shell32_star.ico")
         
         self.set_global_font()
@@ -117,74 +443,148 @@ class FileTracker(wx.Frame):
         
         self.load_accessed_paths()
         self.sort_list_items(self.sort_column)
+        self.cursor.execute("SELECT path, access_count FROM paths")
+        self.path_watcher.sync(self.cursor.fetchall())
+        self.path_watcher.start()
+        # 预取最常用路径的目录列表，使浏览树中常用的展开即时完成
+        self.cursor.execute("SELECT path FROM paths ORDER BY access_count DESC LIMIT 20")
+        self.dir_lister.prefetch([row[0] for row in self.cursor.fetchall()])
+        self.importer = None
+        if self.trace is None:
+            # 录制轨迹时不导入，否则回放无法重现这部分写入
+            self.importer = threading.Thread(target=self.import_recent_files, daemon=True)
+            self.importer.start()
+        if self.evictor.policy.enabled:
+            self.evictor.start()
+        self.backup_scheduler = self.create_backup_scheduler()
+        self.backup_scheduler.start()
+        self.instance_server.start()
         self.Bind(wx.EVT_CLOSE, self.on_close)
         self.Bind(wx.EVT_SIZE, self.on_window_resize)
         self.Bind(wx.EVT_ACTIVATE, self.on_activate)
         self.Bind(wx.EVT_SHOW, self.on_show)
         
-        wx.CallAfter(self.restore_scroll_position)
-        self.ignore_scroll_events = False
-        self.scroll_timer = None
-        self.initial_scroll_position = None
+        self.restore_browser_state()
+        wx.CallAfter(self.apply_heat_overlay)
+
+        # 定时只为可见行补齐文件信息；快速滚动时跳过的行不会被 stat。只在显示信息列时运行
+        self.metadata_timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, self.on_metadata_timer, self.metadata_timer)
+        if self.show_metadata:
+            self.metadata_timer.Start(200)
+
+        self.stall_monitor = self.start_stall_monitor()
 
-    def restore_scroll_position(self):
+    def restore_browser_state(self):
+        # 只懒加载展开快照中的节点，并直接定位到锚点，无需定时器或反复滚动
         try:
             with open(self.config_file, 'r') as f:
                 config = json.load(f)
-                scroll_pos = config.get('scroll_position', {})
-                v_relative = scroll_pos.get('v_relative', 0)
-                
-                tree = self.dir_ctrl.GetTreeCtrl()
-                total_height = tree.GetScrollRange(wx.VERTICAL)
-                v_pos = int(v_relative * total_height)
-                
-                self.ignore_scroll_events = True
-                self.initial_scroll_position = v_pos
-                
-                # 立即设置滚动位置
-                tree.SetScrollPos(wx.VERTICAL, v_pos)
-                tree.Refresh()
-                
-                # 使用一个短暂的定时器来确保滚动位置已经被正确设置
-                wx.CallLater(50, self.finalize_scroll_restore)
         except (FileNotFoundError, json.JSONDecodeError) as e:
-            print(f"恢复滚动位置时出错: {e}")
-
-    def finalize_scroll_restore(self):
-        tree = self.dir_ctrl.GetTreeCtrl()
-        current_pos = tree.GetScrollPos(wx.VERTICAL)
-        
-        if current_pos != self.initial_scroll_position:
-            tree.SetScrollPos(wx.VERTICAL, self.initial_scroll_position)
-            tree.Refresh()
-        
-        # 短暂冻结树控件以防止闪烁
-        tree.Freeze()
-        wx.CallLater(100, self.unfreeze_tree, tree)
-        
-        self.ignore_scroll_events = False
+            print(f"恢复浏览状态时出错: {e}")
+            return
+        state = config.get('browser_state')
+        if state:
+            self.dir_ctrl.RestoreState(state)
+
+    def start_trace(self):
+        # 设置环境变量 FILE_TRACKER_TRACE 或配置项 trace_file 后录制用户操作，供 python -m file_tracker replay 回放
+        trace_file = os.environ.get('FILE_TRACKER_TRACE')
+        if not trace_file:
+            try:
+                with open(self.config_file, 'r') as f:
+                    trace_file = json.load(f).get('trace_file')
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+        if not trace_file:
+            return None
+        try:
+            return TraceRecorder(trace_file, self.conn)
+        except OSError as e:
+            print(f"无法创建轨迹文件: {e}")
+            return None
 
-    def unfreeze_tree(self, tree):
-        tree.Thaw()
-        tree.Refresh()
+    def start_stall_monitor(self):
+        # 设置环境变量 FILE_TRACKER_WATCHDOG=1 或配置项 stall_watchdog 后，界面卡顿时记录调用栈到 stalls.log
+        config = {}
+        try:
+            with open(self.config_file, 'r') as f:
+                config = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        if not is_enabled(os.environ.get('FILE_TRACKER_WATCHDOG'), config.get('stall_watchdog')):
+            return None
+        monitor = StallMonitor(wx.CallAfter, os.path.join(self.app_data_dir, 'stalls.log'),
+                               threshold=config.get('stall_threshold', 0.5))
+        monitor.start()
+        return monitor
+
+    def trace_event(self, op, *args):
+        if self.trace is not None:
+            self.trace.log(op, *args)
+
+    def trace_checkpoint(self, op, *args):
+        # 导入、同步等批量写入无法逐条录制，记下写入后的摘要
+        if self.trace is not None:
+            self.trace.checkpoint(op, self.conn, *args)
 
     def init_database(self):
-        self.db_path = os.path.join(os.path.expanduser("~"), "file_tracker.db")
+        self.db_path = get_db_path()
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            self.conn = connect(self.db_path)
             self.cursor = self.conn.cursor()
-            self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS paths (
-                id INTEGER PRIMARY KEY,
-                path TEXT UNIQUE,
-                access_count INTEGER DEFAULT 1,
-                last_access_time TEXT,
-                is_pinned INTEGER DEFAULT 0
-            )
-            ''')
-            self.conn.commit()
-        except sqlite3.Error as e:
+        except sqlite3.OperationalError as e:
+            # 被锁定或无法打开并不代表损坏，不能用快照覆盖
             wx.MessageBox(f"初始化数据库时发生错误: {e}", "数据库错误", wx.OK | wx.ICON_ERROR)
+        except sqlite3.DatabaseError as e:
+            # 数据库文件已损坏时尝试从最新的完好快照恢复
+            snapshot = restore_latest(self.db_path, self.backup_dir)
+            if snapshot:
+                wx.MessageBox(f"数据库已损坏，已从备份恢复: {os.path.basename(snapshot)}", "数据库恢复", wx.OK | wx.ICON_WARNING)
+                self.conn = connect(self.db_path)
+                self.cursor = self.conn.cursor()
+            else:
+                wx.MessageBox(f"初始化数据库时发生错误: {e}", "数据库错误", wx.OK | wx.ICON_ERROR)
+
+    def create_backup_scheduler(self):
+        # 完整性检查与定期备份都在后台线程进行，检查失败时回到 UI 线程恢复
+        return BackupScheduler(self.db_path, self.backup_dir,
+                               on_corrupt=lambda: wx.CallAfter(self.recover_database),
+                               on_error=lambda e: print(f"备份数据库时出错: {e}"))
+
+    def create_evictor(self):
+        return Evictor(self.db_path, self.load_retention_policy(),
+                       on_evicted=lambda paths: wx.CallAfter(self.on_paths_evicted, paths))
+
+    def recover_database(self):
+        # 替换数据库文件前先停下各自持有连接的后台任务，并等它们关闭连接
+        self.evictor.stop()
+        self.backup_scheduler.stop()
+        if self.importer is not None:
+            self.importer.join()
+            self.importer = None
+        self.conn.close()
+        snapshot = restore_latest(self.db_path, self.backup_dir)
+        # 没有可用快照时保持原样打开，不再尝试建表
+        self.conn = connect(self.db_path) if snapshot else sqlite3.connect(self.db_path)
+        self.cursor = self.conn.cursor()
+        if snapshot:
+            # 内存中的缓存都来自损坏前的数据库，按恢复后的内容全部重新加载
+            self.pinned_paths = self.load_pinned_paths()
+            self.transitions = TransitionModel()
+            self.transitions.load(self.conn)
+            self.metadata.clear()
+            self.missing_paths.clear()
+            self.reload_accessed_paths()
+            self.update_suggestions()
+            wx.MessageBox(f"数据库已损坏，已从备份恢复: {os.path.basename(snapshot)}", "数据库恢复", wx.OK | wx.ICON_WARNING)
+            self.evictor = self.create_evictor()
+            if self.evictor.policy.enabled:
+                self.evictor.start()
+            self.backup_scheduler = self.create_backup_scheduler()
+            self.backup_scheduler.start()
+        else:
+            wx.MessageBox("数据库已损坏，且没有可用的备份。", "数据库错误", wx.OK | wx.ICON_ERROR)
 
     def set_icon(self, icon_name):
         icon_paths = [
@@ -228,7 +628,8 @@ class FileTracker(wx.Frame):
         splitter = wx.SplitterWindow(panel, style=wx.SP_LIVE_UPDATE | wx.SP_NOBORDER)
         splitter.SetBackgroundColour(self.GetBackgroundColour())
 
-        self.dir_ctrl = wx.GenericDirCtrl(splitter, -1, dir=self.last_directory, style=wx.DIRCTRL_3D_INTERNAL|wx.DIRCTRL_MULTIPLE)
+        self.dir_lister = DirectoryLister()
+        self.dir_ctrl = BrowserTree(splitter, self.dir_lister, dir=self.last_directory, on_populated=self.apply_heat_overlay)
         self.dir_ctrl.ShowHidden(True)
         self.dir_ctrl.SetMinSize((300, -1))  # 设置最小宽度为300像素
         tree = self.dir_ctrl.GetTreeCtrl()
@@ -237,8 +638,8 @@ class FileTracker(wx.Frame):
         # 添加双击事件绑定
         tree.Bind(wx.EVT_TREE_ITEM_ACTIVATED, self.on_dir_item_activated)
         
-        # 在这里添加滚动事件绑定
-        tree.Bind(wx.EVT_SCROLLWIN, self.on_scroll)
+        # 展开节点时按访问热度为子节点着色
+        tree.Bind(wx.EVT_TREE_ITEM_EXPANDED, self.on_dir_item_expanded)
         
         right_panel = wx.Panel(splitter)
         right_panel.SetBackgroundColour(self.GetBackgroundColour())
@@ -249,12 +650,22 @@ class FileTracker(wx.Frame):
         self.list_ctrl.InsertColumn(0, '访问的路径', width=400)   # 访问路径列宽
         self.list_ctrl.InsertColumn(1, '频次', width=80)   # 频次列宽
         self.list_ctrl.InsertColumn(2, '最后访问时间', width=200)   # 最后访问时间列宽
+        if self.show_metadata:
+            self.insert_metadata_columns()
         self.list_ctrl.Bind(wx.EVT_LIST_COL_CLICK, self.on_column_click)
+        self.list_ctrl.Bind(wx.EVT_LIST_COL_RIGHT_CLICK, self.on_column_right_click)
         self.list_ctrl.Bind(wx.EVT_LIST_ITEM_RIGHT_CLICK, self.on_right_click)
         self.list_ctrl.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_item_activated)
 
         right_sizer.Add(self.list_ctrl, 1, wx.EXPAND | wx.ALL, 5)
 
+        # 下一个文件夹的建议栏
+        self.suggestion_panel = wx.Panel(right_panel)
+        self.suggestion_panel.SetBackgroundColour(self.GetBackgroundColour())
+        self.suggestion_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.suggestion_panel.SetSizer(self.suggestion_sizer)
+        right_sizer.Add(self.suggestion_panel, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 5)
+
         btn_sizer = wx.BoxSizer(wx.HORIZONTAL)
 
         # 切换排序
@@ -265,6 +676,12 @@ class FileTracker(wx.Frame):
         sort_btn = CustomButton(right_panel, '切换排序')
         sort_btn.Bind(wx.EVT_BUTTON, self.on_toggle_sort)
         btn_sizer.Add(sort_btn, 0, wx.RIGHT | wx.TOP | wx.BOTTOM, 5)
+        group_btn = CustomButton(right_panel, '目录汇总')
+        group_btn.Bind(wx.EVT_BUTTON, self.on_group_by_parent)
+        btn_sizer.Add(group_btn, 0, wx.RIGHT | wx.TOP | wx.BOTTOM, 5)
+        history_btn = CustomButton(right_panel, '导入导出')
+        history_btn.Bind(wx.EVT_BUTTON, self.on_history_menu)
+        btn_sizer.Add(history_btn, 0, wx.RIGHT | wx.TOP | wx.BOTTOM, 5)
 
         btn_sizer.AddStretchSpacer()
 
@@ -345,8 +762,9 @@ class FileTracker(wx.Frame):
         self.list_ctrl.SetColumnWidth(2, last_access_width)
         
         # 计算路径列的宽度
+        metadata_width = sum(self.list_ctrl.GetColumnWidth(i) for i in range(3, self.list_ctrl.GetColumnCount()))
         path_min_width = 300  # 设置一个较宽的最小宽度
-        path_width = max(list_width - frequency_width - last_access_width - 20, path_min_width)  # 20 是滚动条的估计宽度
+        path_width = max(list_width - frequency_width - last_access_width - metadata_width - 20, path_min_width)  # 20 是滚动条的估计宽度
         self.list_ctrl.SetColumnWidth(0, path_width)
 
     def on_always_on_top(self, event):
@@ -371,56 +789,32 @@ class FileTracker(wx.Frame):
                 self.open_folder(path)
             else:
                 self.remove_invalid_path(path)
-        wx.CallLater(100, self.reset_dir_ctrl_scroll)  # 100毫秒延迟
+        wx.CallAfter(self.reset_dir_ctrl_scroll)
 
     def open_folder(self, path):
-        if os.path.isfile(path):
-            folder_to_open = os.path.dirname(path)
-        else:
-            folder_to_open = path
-        subprocess.Popen(f'explorer "{folder_to_open}"')
+        # 在后台打开，文件会打开其所在文件夹，连续双击只打开一次
+        self.trace_event('open', path)
+        self.launcher.open(path)
 
     def reset_dir_ctrl_scroll(self):
-        tree = self.dir_ctrl.GetTreeCtrl()
-        wx.CallAfter(self._do_reset_horizontal_scroll, tree)
-
-    def _do_reset_horizontal_scroll(self, tree):
-        tree.SetScrollPos(wx.HORIZONTAL, 0)
-        
-        # 获取根节点
-        root = tree.GetRootItem()
-        if root.IsOk():
-            # 获取第一个子节点（通常是第一个驱动器）
-            first_child, cookie = tree.GetFirstChild(root)
-            if first_child.IsOk():
-                # 获取当前可见的第一个项目
-                first_visible = tree.GetFirstVisibleItem()
-                
-                # 滚动到第一个子节点以重置水平滚动条
-                tree.ScrollTo(first_child)
-                
-                # 如果之前有可见项目，则重新滚动到该项目
-                if first_visible.IsOk():
-                    tree.ScrollTo(first_visible)
-                    tree.EnsureVisible(first_visible)
-        
-        # 强制更新布局
-        tree.Update()
-        tree.Refresh()
-        
-        # 再次检查并设置水平滚动位置
-        final_h_pos = tree.GetScrollPos(wx.HORIZONTAL)
-        if final_h_pos != 0:
-            tree.SetScrollPos(wx.HORIZONTAL, 0)
+        self.dir_ctrl.ResetHorizontalScroll()
 
     def on_clear(self, event):
         dlg = wx.MessageDialog(self, "确定要清空所有记录吗？", "确认清空", wx.YES_NO | wx.ICON_QUESTION)
         result = dlg.ShowModal()
         if result == wx.ID_YES:
+            self.trace_event('clear')
             self.cursor.execute("DELETE FROM paths")
             self.conn.commit()
             self.list_ctrl.DeleteAllItems()
+            self.metadata.clear()
             self.pinned_paths.clear()
+            self.path_trie.clear()
+            self.transitions = TransitionModel()
+            self.update_suggestions()
+            self.missing_paths.clear()
+            self.path_watcher.sync([])
+            self.apply_heat_overlay()
             self.adjust_column_widths()
         dlg.Destroy()
         self.Refresh()
@@ -450,26 +844,107 @@ class FileTracker(wx.Frame):
         self.PopupMenu(menu)
         menu.Destroy()
 
+    def on_history_menu(self, event):
+        menu = wx.Menu()
+        export_item = menu.Append(wx.ID_ANY, "导出记录...")
+        self.Bind(wx.EVT_MENU, self.on_export_history, export_item)
+        import_item = menu.Append(wx.ID_ANY, "导入记录...")
+        self.Bind(wx.EVT_MENU, self.on_import_history, import_item)
+        menu.AppendSeparator()
+        sync_item = menu.Append(wx.ID_ANY, "与其他设备同步...")
+        self.Bind(wx.EVT_MENU, self.on_sync_history, sync_item)
+        self.PopupMenu(menu)
+        menu.Destroy()
+
+    def run_with_progress(self, title, task):
+        dlg = wx.ProgressDialog(title, "请稍候...", maximum=1000, parent=self,
+                                style=wx.PD_APP_MODAL | wx.PD_AUTO_HIDE | wx.PD_ELAPSED_TIME)
+        def progress(done, total):
+            dlg.Update(int(1000 * done / total) if total else 1000)
+        try:
+            return task(progress)
+        finally:
+            dlg.Destroy()
+
+    def on_export_history(self, event):
+        wildcard = "JSON Lines (*.jsonl)|*.jsonl|CSV (*.csv)|*.csv"
+        dlg = wx.FileDialog(self, "导出记录", defaultDir=self.app_data_dir,
+                            defaultFile=os.path.basename(self.accessed_paths_file),
+                            wildcard=wildcard, style=wx.FD_SAVE | wx.FD_OVERWRITE_PROMPT)
+        if dlg.ShowModal() == wx.ID_OK:
+            file_path = dlg.GetPath()
+            try:
+                count = self.run_with_progress("导出记录", lambda progress: export_history(self.conn, file_path, progress=progress))
+                wx.MessageBox(f"已导出 {count} 条记录。", "导出完成", wx.OK | wx.ICON_INFORMATION)
+            except (OSError, sqlite3.Error) as e:
+                wx.MessageBox(f"导出记录时发生错误: {e}", "导出失败", wx.OK | wx.ICON_ERROR)
+        dlg.Destroy()
+
+    def on_import_history(self, event):
+        wildcard = "JSON Lines (*.jsonl)|*.jsonl|CSV (*.csv)|*.csv"
+        dlg = wx.FileDialog(self, "导入记录", defaultDir=self.app_data_dir,
+                            wildcard=wildcard, style=wx.FD_OPEN | wx.FD_FILE_MUST_EXIST)
+        if dlg.ShowModal() == wx.ID_OK:
+            file_path = dlg.GetPath()
+            try:
+                count, skipped = self.run_with_progress(
+                    "导入记录", lambda progress: import_history(self.conn, file_path, progress=progress))
+                self.trace_checkpoint('import', file_path)
+                self.pinned_paths = self.load_pinned_paths()
+                self.reload_accessed_paths()
+                message = f"已导入并合并 {count} 条记录。"
+                if skipped:
+                    message += f"\n有 {skipped} 条记录格式无效，已跳过。"
+                wx.MessageBox(message, "导入完成", wx.OK | wx.ICON_INFORMATION)
+            except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+                wx.MessageBox(f"导入记录时发生错误: {e}", "导入失败", wx.OK | wx.ICON_ERROR)
+        dlg.Destroy()
+
+    def on_sync_history(self, event):
+        # 共享文件夹（如网盘同步目录）中存放各设备的增量文件
+        try:
+            with open(self.config_file, 'r') as f:
+                sync_folder = json.load(f).get('sync_folder', '')
+        except (FileNotFoundError, json.JSONDecodeError):
+            sync_folder = ''
+        dlg = wx.DirDialog(self, "选择共享文件夹", defaultPath=sync_folder)
+        if dlg.ShowModal() == wx.ID_OK:
+            sync_folder = dlg.GetPath()
+            self.update_config(sync_folder=sync_folder)
+            try:
+                with wx.BusyCursor():
+                    exported, merged = HistorySync(self.conn, sync_folder).sync()
+                self.trace_checkpoint('sync', sync_folder)
+                self.pinned_paths = self.load_pinned_paths()
+                self.reload_accessed_paths()
+                wx.MessageBox(f"已写出 {exported} 条变化，合并 {merged} 条其他设备的变化。", "同步完成", wx.OK | wx.ICON_INFORMATION)
+            except (OSError, ValueError, sqlite3.Error) as e:
+                wx.MessageBox(f"同步时发生错误: {e}", "同步失败", wx.OK | wx.ICON_ERROR)
+        dlg.Destroy()
+
     def on_pin(self, event):
         selected = self.list_ctrl.GetFirstSelected()
         if selected != -1:
-            path = self.list_ctrl.GetItemText(selected)
-            if path not in self.pinned_paths:
-                self.pinned_paths.insert(0, path)
-                self.cursor.execute("UPDATE paths SET is_pinned = 1 WHERE path = ?", (path,))
-                self.conn.commit()
-                self.sort_list_items(self.sort_column)
+            self.set_path_pinned(self.list_ctrl.GetItemText(selected), True)
 
     def on_unpin(self, event):
         selected = self.list_ctrl.GetFirstSelected()
         if selected != -1:
-            path = self.list_ctrl.GetItemText(selected)
-            if path in self.pinned_paths:
-                self.pinned_paths.remove(path)
-                self.cursor.execute("UPDATE paths SET is_pinned = 0 WHERE path = ?", (path,))
-                self.conn.commit()
-                self.sort_list_items(self.sort_column)
-    
+            self.set_path_pinned(self.list_ctrl.GetItemText(selected), False)
+
+    def set_path_pinned(self, path, pinned):
+        # 界面菜单与命令行（经本地通道）的置顶都走这里
+        path = self.canonical(path)
+        if pinned == (path in self.pinned_paths) or self.find_path(path) == -1:
+            return
+        self.trace_event('pin' if pinned else 'unpin', path)
+        if pinned:
+            self.pinned_paths.insert(0, path)
+        else:
+            self.pinned_paths.remove(path)
+        set_pinned(self.conn, path, pinned)
+        self.sort_list_items(self.sort_column)
+
     def on_copy(self, event):
         selected = self.list_ctrl.GetFirstSelected()
         if selected != -1:
@@ -485,7 +960,7 @@ class FileTracker(wx.Frame):
             if os.path.exists(path):
                 self.open_folder(path)
                 self.record_accessed_path(path)
-                wx.CallLater(100, self.reset_dir_ctrl_scroll)  # 100毫秒延迟
+                wx.CallAfter(self.reset_dir_ctrl_scroll)
             else:
                 self.remove_invalid_path(path)
                 self.load_accessed_paths()
@@ -497,32 +972,71 @@ class FileTracker(wx.Frame):
         if os.path.exists(path):
             self.open_folder(path)
             self.record_accessed_path(path)
-            wx.CallLater(100, self.reset_dir_ctrl_scroll)  # 100毫秒延迟
+            wx.CallAfter(self.reset_dir_ctrl_scroll)
         else:
             self.remove_invalid_path(path)
             self.load_accessed_paths()
             self.sort_list_items(self.sort_column)
 
+    def canonical(self, path):
+        # 统一分隔符、末尾斜杠与盘符；大小写不敏感时沿用已有记录的写法，避免同一路径分成多行
+        path = canonical_path(path)
+        node = self.path_trie.node(path)
+        return node.path if node is not None and node.is_recorded else path
+
     def record_accessed_path(self, path):
-        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.cursor.execute('''
-        INSERT INTO paths (path, access_count, last_access_time)
-        VALUES (?, 1, ?)
-        ON CONFLICT(path) DO UPDATE SET
-        access_count = access_count + 1,
-        last_access_time = ?
-        ''', (path, now, now))
-        self.conn.commit()
+        path = self.canonical(path)
+        now = datetime.now().strftime(TIME_FORMAT)
+        self.trace_event('record', path, now)
+        upsert_paths(self.conn, [(path, 1, now)])
+        node = self.path_trie.add(path, 1, now)
+        self.transitions.observe(path)
+        self.update_suggestions()
+        self.path_watcher.track(path, node.own_count)
+        self.missing_paths.discard(path)
+        self.apply_heat_overlay()
         self.load_accessed_paths()
         self.sort_list_items(self.sort_column)
 
+    def record_external_paths(self, rows):
+        # 通道中的访问已按路径合并为一批 (路径, 次数, 最后时间)，只写入与刷新一次
+        if not rows:
+            return
+        rows = [(self.canonical(path), count, now) for path, count, now in rows]
+        upsert_paths(self.conn, rows)
+        # 合并后只剩每个路径的最后访问时间，按它排序近似还原访问顺序供转移模型学习
+        for path, count, now in sorted(rows, key=lambda row: row[2]):
+            for _ in range(count):
+                self.trace_event('record', path, now)
+            node = self.path_trie.add(path, count, now)
+            self.path_watcher.track(path, node.own_count)
+            self.missing_paths.discard(path)
+            self.transitions.observe(path)
+        self.update_suggestions()
+        self.apply_heat_overlay()
+        self.load_accessed_paths()
+        self.sort_list_items(self.sort_column)
+
+    def raise_window(self):
+        if self.IsIconized():
+            self.Iconize(False)
+        self.Show()
+        self.Raise()
+        self.RequestUserAttention()
+
     def remove_invalid_path(self, path):
         index = self.find_path(path)
         if index != -1:
             self.list_ctrl.DeleteItem(index)
+            self.trace_event('delete', path)
             # 从数据库中删除记录
             self.cursor.execute("DELETE FROM paths WHERE path=?", (path,))
             self.conn.commit()
+            self.path_trie.remove(path)
+            self.metadata.invalidate(path)
+            self.transitions.forget(path)
+            self.path_watcher.untrack(path)
+            self.missing_paths.discard(path)
             # 如果是置顶路径，也从置顶列表中移除
             if path in self.pinned_paths:
                 self.pinned_paths.remove(path)
@@ -538,6 +1052,143 @@ class FileTracker(wx.Frame):
             self.cursor.execute("SELECT path FROM paths WHERE is_pinned = 1 ORDER BY id")
             return [row[0] for row in self.cursor.fetchall()]
 
+    def apply_path_changes(self, renames, deleted, restored):
+        # 改名：原地更新路径，保留频次与置顶状态
+        for old, new in renames:
+            self.trace_event('rename', old, new)
+            self.metadata.invalidate(old)
+            self.metadata.invalidate(new)
+            for old_path, new_path in rename_path_prefix(self.conn, old, new):
+                if old_path in self.pinned_paths:
+                    index = self.pinned_paths.index(old_path)
+                    if new_path in self.pinned_paths:
+                        del self.pinned_paths[index]
+                    else:
+                        self.pinned_paths[index] = new_path
+                if old_path in self.missing_paths:
+                    self.missing_paths.discard(old_path)
+                    self.missing_paths.add(new_path)
+                self.transitions.forget(old_path)
+            self.path_trie.move(old, new)
+        # 删除：仅标记为失效，用户点击时再按原有流程清理
+        for path in deleted:
+            self.metadata.invalidate(path)
+            self.missing_paths.update(node.path for node in self.path_trie.records_under(path))
+        for path in restored:
+            self.metadata.invalidate(path)
+            self.missing_paths.difference_update(node.path for node in self.path_trie.records_under(path))
+        self.load_accessed_paths()
+        self.sort_list_items(self.sort_column)
+
+    def import_recent_files(self):
+        # 在后台线程中使用独立连接导入系统“最近使用”记录，只处理上次检查点之后的新条目
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                imported = import_recent(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f"导入最近使用记录时出错: {e}")
+            return
+        if imported:
+            wx.CallAfter(self.reload_accessed_paths)
+
+    def reload_accessed_paths(self):
+        self.path_trie = self.load_path_trie()
+        self.load_accessed_paths()
+        self.sort_list_items(self.sort_column)
+        self.cursor.execute("SELECT path, access_count FROM paths")
+        self.path_watcher.sync(self.cursor.fetchall())
+        self.apply_heat_overlay()
+
+    def load_retention_policy(self):
+        try:
+            with open(self.config_file, 'r') as f:
+                config = json.load(f)
+            return RetentionPolicy.from_config(config.get('retention', {}))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return RetentionPolicy()
+
+    def on_paths_evicted(self, paths):
+        # 后台按保留策略删除的记录，同步移出列表与各缓存
+        evicted = set(paths)
+        self.trace_event('evict', paths)
+        for path in paths:
+            self.path_trie.remove(path)
+            self.metadata.invalidate(path)
+            self.transitions.forget(path)
+            self.path_watcher.untrack(path)
+            self.missing_paths.discard(path)
+        for index in reversed(range(self.list_ctrl.GetItemCount())):
+            if self.list_ctrl.GetItemText(index) in evicted:
+                self.list_ctrl.DeleteItem(index)
+        self.adjust_column_widths()
+
+    def update_suggestions(self):
+        # 建议在记录访问时已预先算好，这里只重建几个按钮
+        self.suggestion_panel.Freeze()
+        self.suggestion_sizer.Clear(delete_windows=True)
+        suggestions = [path for path in self.transitions.suggest() if path in self.path_trie]
+        if suggestions:
+            label = wx.StaticText(self.suggestion_panel, label="接下来可能访问:")
+            self.suggestion_sizer.Add(label, 0, wx.ALIGN_CENTER_VERTICAL | wx.RIGHT, 5)
+        for path in suggestions:
+            btn = CustomButton(self.suggestion_panel, os.path.basename(path.rstrip('\\/')) or path)
+            btn.SetToolTip(path)
+            # 处理点击时会重建按钮，推迟到事件处理结束后，避免在按钮自己的回调中销毁它
+            btn.Bind(wx.EVT_BUTTON, lambda event, path=path: wx.CallAfter(self.on_suggestion, path))
+            self.suggestion_sizer.Add(btn, 0, wx.RIGHT | wx.TOP, 5)
+        self.suggestion_panel.Layout()
+        self.suggestion_panel.GetParent().Layout()
+        self.suggestion_panel.Thaw()
+
+    def on_suggestion(self, path):
+        if os.path.exists(path):
+            self.open_folder(path)
+            self.record_accessed_path(path)
+        else:
+            self.remove_invalid_path(path)
+            self.update_suggestions()
+
+    def load_path_trie(self):
+        self.cursor.execute("SELECT path, access_count, last_access_time FROM paths")
+        return PathTrie.from_rows(self.cursor.fetchall())
+
+    def heat_colour(self, heat):
+        # 热度越高颜色越接近橙色
+        heat = min(1.0, heat ** 0.5)
+        return wx.Colour(255, int(255 - 70 * heat), int(255 - 150 * heat))
+
+    def apply_heat_overlay(self, item=None):
+        tree = self.dir_ctrl.GetTreeCtrl()
+        if item is None:
+            item = tree.GetRootItem()
+            if not item.IsOk():
+                return
+        # 只处理已展开的节点，未展开的子节点在展开时再着色
+        child, cookie = tree.GetFirstChild(item)
+        while child.IsOk():
+            path = self.dir_ctrl.GetPath(child)
+            heat = self.path_trie.heat(path) if path else 0
+            if heat > 0:
+                tree.SetItemBackgroundColour(child, self.heat_colour(heat))
+            else:
+                tree.SetItemBackgroundColour(child, tree.GetBackgroundColour())
+            if tree.IsExpanded(child):
+                self.apply_heat_overlay(child)
+            child, cookie = tree.GetNextChild(item, cookie)
+
+    def on_dir_item_expanded(self, event):
+        self.apply_heat_overlay(event.GetItem())
+        event.Skip()
+
+    def on_group_by_parent(self, event):
+        paths = [self.list_ctrl.GetItemText(i) for i in range(self.list_ctrl.GetItemCount())]
+        dlg = GroupByParentDialog(self, self.path_trie.group_by_parent(paths))
+        dlg.ShowModal()
+        dlg.Destroy()
+
     def load_accessed_paths(self):
         self.list_ctrl.DeleteAllItems()
         
@@ -579,13 +1230,17 @@ class FileTracker(wx.Frame):
 
     def on_column_click(self, event):
         column = event.GetColumn()
+        if column > 2:
+            return  # 文件信息列只为可见行获取，无法按其排序
         self.sort_column = column
         self.sort_reverse = not self.sort_reverse
+        self.trace_event('sort', column, self.sort_reverse)
         self.sort_list_items(column)
 
     def on_toggle_sort(self, event):
         self.sort_column = 1 if self.sort_column == 2 else 2
         self.sort_reverse = True
+        self.trace_event('sort', self.sort_column, self.sort_reverse)
         self.sort_list_items(self.sort_column)
 
     def sort_list_items(self, column):
@@ -605,7 +1260,9 @@ class FileTracker(wx.Frame):
         elif column == 1:  # 访问次数
             unpinned_items.sort(key=lambda x: x[1], reverse=self.sort_reverse)
         elif column == 2:  # 最后访问时间
-            unpinned_items.sort(key=lambda x: datetime.strptime(x[2], "%Y-%m-%d %H:%M:%S"), reverse=self.sort_reverse)
+            # 没有访问时间的记录排在最早
+            unpinned_items.sort(key=lambda x: datetime.strptime(x[2], TIME_FORMAT) if x[2] else datetime.min,
+                                reverse=self.sort_reverse)
 
         # 对置顶项按照它们在 self.pinned_paths 中的顺序排序
         pinned_items.sort(key=lambda x: self.pinned_paths.index(x[0]))
@@ -625,9 +1282,79 @@ class FileTracker(wx.Frame):
                 self.list_ctrl.SetItemBackgroundColour(list_index, wx.Colour(255, 255, 200))  # 浅芽黄色
             else:
                 self.list_ctrl.SetItemBackgroundColour(list_index, wx.WHITE)  # 恢复默认背景色
+
+            # 已失效的路径显示为灰色
+            if item[0] in self.missing_paths:
+                self.list_ctrl.SetItemTextColour(list_index, wx.Colour(160, 160, 160))
+            else:
+                self.list_ctrl.SetItemTextColour(list_index, wx.BLACK)
         
         self.adjust_column_widths()
 
+    def load_show_metadata(self):
+        try:
+            with open(self.config_file, 'r') as f:
+                return json.load(f).get('show_metadata', False)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return False
+
+    def insert_metadata_columns(self):
+        for offset, (title, width) in enumerate(self.METADATA_COLUMNS):
+            self.list_ctrl.InsertColumn(3 + offset, title, width=width)
+
+    def on_column_right_click(self, event):
+        menu = wx.Menu()
+        item = menu.AppendCheckItem(wx.ID_ANY, "显示大小、修改时间和类型")
+        item.Check(self.show_metadata)
+        self.Bind(wx.EVT_MENU, self.on_toggle_metadata, item)
+        self.PopupMenu(menu)
+        menu.Destroy()
+
+    def on_toggle_metadata(self, event):
+        self.show_metadata = not self.show_metadata
+        if self.show_metadata:
+            self.insert_metadata_columns()
+            self.metadata_timer.Start(200)
+        else:
+            self.metadata_timer.Stop()
+            for column in reversed(range(3, self.list_ctrl.GetColumnCount())):
+                self.list_ctrl.DeleteColumn(column)
+        self.adjust_column_widths()
+        self.update_config(show_metadata=self.show_metadata)
+
+    def visible_rows(self):
+        top = self.list_ctrl.GetTopItem()
+        return range(top, min(top + self.list_ctrl.GetCountPerPage() + 1, self.list_ctrl.GetItemCount()))
+
+    def on_metadata_timer(self, event):
+        if not self.show_metadata or not self.list_ctrl.IsShownOnScreen():
+            return
+        wanted = []
+        for row in self.visible_rows():
+            path = self.list_ctrl.GetItemText(row)
+            info = self.metadata.get(path)
+            if info is None:
+                wanted.append(path)
+            else:
+                self.set_metadata_cells(row, path, info)
+        if wanted:
+            self.metadata.request(wanted, lambda results: wx.CallAfter(self.on_metadata_ready, results))
+
+    def on_metadata_ready(self, results):
+        # 结果返回时行可能已移动，只更新当前可见的行
+        if not self.show_metadata:
+            return
+        for row in self.visible_rows():
+            path = self.list_ctrl.GetItemText(row)
+            if path in results:
+                self.set_metadata_cells(row, path, results[path])
+
+    def set_metadata_cells(self, row, path, info):
+        texts = (format_size(info.size), format_mtime(info), file_type(path, info))
+        for column, text in enumerate(texts, 3):
+            if self.list_ctrl.GetItemText(row, column) != text:
+                self.list_ctrl.SetItem(row, column, text)
+
     def on_key_press(self, event):
         keycode = event.GetKeyCode()
         if event.ControlDown() and keycode == 67:  # Ctrl+C
@@ -643,8 +1370,14 @@ class FileTracker(wx.Frame):
             if result == wx.ID_YES:
                 path = self.list_ctrl.GetItemText(selected)
                 self.list_ctrl.DeleteItem(selected)
+                self.trace_event('delete', path)
                 self.cursor.execute("DELETE FROM paths WHERE path=?", (path,))
                 self.conn.commit()
+                self.path_trie.remove(path)
+                self.metadata.invalidate(path)
+                self.transitions.forget(path)
+                self.path_watcher.untrack(path)
+                self.missing_paths.discard(path)
                 if path in self.pinned_paths:
                     self.pinned_paths.remove(path)
                 self.adjust_column_widths()
@@ -663,37 +1396,57 @@ class FileTracker(wx.Frame):
     def save_last_directory(self):
         current_dir = self.dir_ctrl.GetPath()
         if os.path.exists(current_dir):
-            config = {'last_directory': current_dir}
-            try:
-                with open(self.config_file, 'w') as f:
-                    json.dump(config, f)
-            except IOError as e:
-                wx.LogError(f"无法保存配置: {e}")
+            self.update_config(last_directory=current_dir)
+
+    def update_config(self, **values):
+        # 只更新给定的键，保留配置文件中的其他设置
+        config = {}
+        try:
+            with open(self.config_file, 'r') as f:
+                config = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        config.update(values)
+        try:
+            with open(self.config_file, 'w') as f:
+                json.dump(config, f)
+        except IOError as e:
+            wx.LogError(f"无法保存配置: {e}")
 
     def on_close(self, event):
+        if self.stall_monitor is not None:
+            self.stall_monitor.stop()
+        self.metadata_timer.Stop()
+        self.record_external_paths(self.instance_server.stop())
+        self.evictor.stop()
+        self.backup_scheduler.stop()
         self.save_last_directory()
         self.save_accessed_paths()
-        self.save_scroll_position()
+        if self.trace is not None:
+            self.trace.close(self.conn)
+        self.save_browser_state()
+        self.transitions.save(self.conn)
+        self.path_watcher.stop()
+        self.dir_lister.shutdown()
+        self.launcher.shutdown()
+        self.metadata.shutdown()
         self.conn.close()
         event.Skip()
 
-    def save_scroll_position(self):
-        tree = self.dir_ctrl.GetTreeCtrl()
-        v_pos = tree.GetScrollPos(wx.VERTICAL)
-        total_height = tree.GetScrollRange(wx.VERTICAL)
-        relative_pos = v_pos / total_height if total_height > 0 else 0
-        
+    def save_browser_state(self):
         config = {}
         try:
             with open(self.config_file, 'r') as f:
                 config = json.load(f)
         except (FileNotFoundError, json.JSONDecodeError):
             pass
-        config['scroll_position'] = {'v_relative': relative_pos}
+        config.pop('scroll_position', None)  # 旧版本的相对滚动位置
+        config['browser_state'] = self.dir_ctrl.GetState()
         with open(self.config_file, 'w') as f:
             json.dump(config, f)
 
     def on_window_resize(self, event):
+        self.trace_event('resize', *event.GetSize())
         self.adjust_column_widths()
         event.Skip()
 
@@ -723,7 +1476,7 @@ class FileTracker(wx.Frame):
             if os.path.exists(folder_to_open):
                 self.open_folder(folder_to_open)
                 self.record_accessed_path(folder_to_open)
-                wx.CallLater(100, self.reset_dir_ctrl_scroll)
+                wx.CallAfter(self.reset_dir_ctrl_scroll)
             else:
                 self.remove_invalid_path(folder_to_open)
             event.Veto()
@@ -741,27 +1494,15 @@ class FileTracker(wx.Frame):
         wx.CallAfter(self.reset_dir_ctrl_scroll)
         event.Skip()
         
-    def on_scroll(self, event):
-        if self.ignore_scroll_events:
-            return
-        
-        tree = self.dir_ctrl.GetTreeCtrl()
-        v_pos = tree.GetScrollPos(wx.VERTICAL)
-        total_height = tree.GetScrollRange(wx.VERTICAL)
-        relative_pos = v_pos / total_height if total_height > 0 else 0
-        
-        if self.scroll_timer:
-            self.scroll_timer.Stop()
-        self.scroll_timer = wx.CallLater(200, self.save_scroll_position)
-        
-        event.Skip()
-
     def on_show(self, event):
         if event.IsShown():
             wx.CallAfter(self.reset_dir_ctrl_scroll)
         event.Skip()
 
 if __name__ == '__main__':
+    # 已有实例在运行时只唤起它的窗口，不再重复启动
+    if notify_running(instance_file(get_db_path()), 'raise'):
+        sys.exit(0)
     app = wx.App()
     if 'wxMSW' in wx.PlatformInfo:
         ctypes.windll.shcore.SetProcessDpiAwareness(True)
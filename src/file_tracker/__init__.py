@@ -0,0 +1 @@
+"""File Tracker 的非界面组件（不依赖 wx / PyQt5）"""
@@ -0,0 +1,143 @@
+import glob
+import os
+import pathlib
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+SNAPSHOT_PREFIX = 'file_tracker-'
+
+
+def check_integrity(db_path, timeout=5.0):
+    """对数据库执行 PRAGMA quick_check，完好时返回 True，损坏时返回 False
+
+    数据库被其他连接锁定或暂时无法打开时无法判断，返回 None，由调用方稍后重试。
+    """
+    if not os.path.exists(db_path):
+        return True
+    # 路径中的 ?、#、% 等字符需要转义，否则会被当作 URI 的查询参数
+    uri = pathlib.Path(os.path.abspath(db_path)).as_uri() + '?mode=ro'
+    try:
+        conn = sqlite3.connect(uri, timeout=timeout, uri=True)
+        try:
+            return conn.execute("PRAGMA quick_check").fetchone()[0] == 'ok'
+        finally:
+            conn.close()
+    except sqlite3.OperationalError:
+        return None  # 锁定、繁忙或无法打开，不代表文件损坏
+    except sqlite3.DatabaseError:
+        return False  # 不是数据库文件或数据库映像损坏
+
+
+def list_snapshots(backup_dir):
+    """按从新到旧的顺序返回快照文件"""
+    return sorted(glob.glob(os.path.join(backup_dir, SNAPSHOT_PREFIX + '*.db')), reverse=True)
+
+
+def create_snapshot(db_path, backup_dir, keep=5, pages=64, pause=0.01, stop=None):
+    """用 SQLite 在线备份接口增量复制数据库，每复制 pages 页停顿 pause 秒
+
+    备份在独立连接上进行，期间其他连接的写入会让 SQLite 自动重新开始复制。
+    成功后轮换快照，只保留最新的 keep 个，返回新快照路径。
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    name = SNAPSHOT_PREFIX + datetime.now().strftime("%Y%m%d-%H%M%S-%f") + '.db'
+    target_path = os.path.join(backup_dir, name)
+    temp_path = target_path + '.tmp'
+
+    def throttle(status, remaining, total):
+        if stop is not None and stop.is_set():
+            raise InterruptedError("备份已取消")
+        time.sleep(pause)
+
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(temp_path)
+    try:
+        source.backup(target, pages=pages, progress=throttle)
+    except BaseException:
+        target.close()
+        os.remove(temp_path)
+        raise
+    finally:
+        source.close()
+    target.close()
+    os.replace(temp_path, target_path)
+
+    for old in list_snapshots(backup_dir)[keep:]:
+        os.remove(old)
+    return target_path
+
+
+def restore_latest(db_path, backup_dir):
+    """用最新的完好快照替换数据库，原文件改名保留；没有可用快照时返回 None"""
+    for snapshot in list_snapshots(backup_dir):
+        if check_integrity(snapshot) is not True:
+            continue
+        if os.path.exists(db_path):
+            os.replace(db_path, db_path + '.corrupt-' + datetime.now().strftime("%Y%m%d-%H%M%S"))
+        for suffix in ('-journal', '-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        shutil.copyfile(snapshot, db_path)
+        return snapshot
+    return None
+
+
+class BackupScheduler:
+    """后台定期备份数据库
+
+    启动后先做完整性检查，确认损坏时才调用 on_corrupt()；数据库被锁定而无法检查时
+    每隔 retry_interval 秒重试。之后每隔 interval 秒（或最新快照已过期时立即）生成一份快照。
+    """
+
+    def __init__(self, db_path, backup_dir, interval=3600, keep=5, on_corrupt=None, on_error=None,
+                 retry_interval=30, busy_timeout=5.0):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.interval = interval
+        self.keep = keep
+        self.retry_interval = retry_interval
+        self.busy_timeout = busy_timeout
+        self.on_corrupt = on_corrupt
+        self.on_error = on_error
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='BackupScheduler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _seconds_until_due(self):
+        snapshots = list_snapshots(self.backup_dir)
+        if not snapshots:
+            return 0
+        return max(0, self.interval - (time.time() - os.path.getmtime(snapshots[0])))
+
+    def _run(self):
+        status = check_integrity(self.db_path, self.busy_timeout)
+        while status is None:
+            if self._stop.wait(self.retry_interval):
+                return
+            status = check_integrity(self.db_path, self.busy_timeout)
+        if not status:
+            if self.on_corrupt:
+                self.on_corrupt()
+            return  # 恢复由界面负责，之后重新启动调度
+        while not self._stop.wait(self._seconds_until_due()):
+            try:
+                create_snapshot(self.db_path, self.backup_dir, self.keep, stop=self._stop)
+            except InterruptedError:
+                return
+            except (OSError, sqlite3.Error) as e:
+                if self.on_error:
+                    self.on_error(e)
+                self._stop.wait(self.interval)
@@ -0,0 +1,128 @@
+import os
+from functools import lru_cache
+
+
+def canonicalize(path, flavor=os.path):
+    """统一分隔符，去掉多余的 .、.. 与末尾分隔符，盘符改为大写；其余部分保留原有大小写
+
+    flavor 为 ntpath 或 posixpath，默认为当前平台。
+    """
+    if not path:
+        return path
+    path = flavor.normpath(path)   # Windows 上同时把 / 统一为 \
+    drive, rest = flavor.splitdrive(path)
+    if len(drive) == 2 and drive[1] == ':':
+        drive = drive.upper()
+    return drive + rest
+
+
+def key_of(path, flavor=os.path):
+    """比较用的键：在不区分大小写的平台（os.path.normcase 会折叠大小写）上再统一为小写"""
+    return flavor.normcase(canonicalize(path, flavor))
+
+
+def is_below(target, key, sep=os.sep):
+    """键 target 是否位于键 key 之下；根目录的键（/、c:\\）本身已以分隔符结尾"""
+    return target.startswith(key.rstrip('\\/') + sep)
+
+
+# os.path.normcase 折叠大小写的平台（Windows）上，只差大小写的路径是同一个
+CASE_INSENSITIVE = os.path.normcase('A') == 'a'
+
+# 记录访问时每次都要调用，按路径缓存结果
+canonical_path = lru_cache(maxsize=4096)(canonicalize)
+path_key = lru_cache(maxsize=4096)(key_of)
+
+
+def merge_duplicates(conn, batch_size=1000, key=path_key, canonical=canonical_path):
+    """一次遍历合并同一路径的不同写法，返回删除的行数
+
+    次数相加、时间取最新、置顶取并集；保留 id 最小的一行（置顶顺序按 id），
+    路径采用最近一次访问时的写法。同步与转移模型的表中以路径为键的记录一并改用该写法。
+    """
+    groups = {}
+    for row in conn.execute("SELECT id, path, access_count, last_access_time, is_pinned FROM paths ORDER BY id"):
+        groups.setdefault(key(row[1]), []).append(row)
+
+    removed = 0
+    deletes = []
+    updates = []
+
+    def write():
+        # 先删除重复行，再更新保留行，避免与 path 的唯一约束冲突
+        conn.executemany("DELETE FROM paths WHERE id = ?", deletes)
+        conn.executemany(
+            "UPDATE paths SET path = ?, access_count = ?, last_access_time = ?, is_pinned = ? WHERE id = ?", updates)
+        conn.commit()
+        deletes.clear()
+        updates.clear()
+
+    spellings = {}
+    for group_key, rows in groups.items():
+        latest = max(rows, key=lambda row: (row[3] or '', row[2] or 0))
+        spelling = spellings[group_key] = canonical(latest[1])
+        if len(rows) == 1 and rows[0][1] == spelling:
+            continue
+        deletes.extend((row[0],) for row in rows[1:])
+        updates.append((spelling,
+                        sum(row[2] or 0 for row in rows),
+                        max((row[3] for row in rows if row[3]), default=None),
+                        max(row[4] or 0 for row in rows),
+                        rows[0][0]))
+        removed += len(rows) - 1
+        if len(updates) >= batch_size:
+            write()
+    write()
+    _merge_related(conn, lambda path: spellings.get(key(path)) or canonical(path))
+    return removed
+
+
+def _rewrite(conn, table, columns, rows):
+    conn.execute(f"DELETE FROM {table}")
+    conn.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})", rows)
+
+
+def _merge_related(conn, spelling):
+    # 这些表行数不多，且只在迁移时执行一次：有写法需要改变时整表重写
+    tables = {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if 'transitions' in tables:
+        rows = conn.execute("SELECT source, target, weight FROM transitions").fetchall()
+        if any(spelling(source) != source or spelling(target) != target for source, target, _ in rows):
+            weights = {}
+            for source, target, weight in rows:
+                pair = (spelling(source), spelling(target))
+                if pair[0] != pair[1]:   # 合并后成为自身到自身的转移没有意义
+                    weights[pair] = weights.get(pair, 0.0) + weight
+            _rewrite(conn, 'transitions', ('source', 'target', 'weight'),
+                     [(source, target, weight) for (source, target), weight in weights.items()])
+    # 同一设备对不同写法的计数相加，时间与序号取最大
+    if 'sync_counters' in tables:
+        rows = conn.execute("SELECT path, device, count, last_access_time, seq FROM sync_counters").fetchall()
+        if any(spelling(row[0]) != row[0] for row in rows):
+            counters = {}
+            for path, device, count, last_access_time, seq in rows:
+                total, last, top = counters.get((spelling(path), device), (0, '', 0))
+                counters[spelling(path), device] = (total + (count or 0), max(last, last_access_time or ''),
+                                                     max(top, seq or 0))
+            _rewrite(conn, 'sync_counters', ('path', 'device', 'count', 'last_access_time', 'seq'),
+                     [key + values for key, values in counters.items()])
+    if 'sync_local' in tables:
+        rows = conn.execute("SELECT path, count, last_access_time FROM sync_local").fetchall()
+        if any(spelling(row[0]) != row[0] for row in rows):
+            changes = {}
+            for path, count, last_access_time in rows:
+                total, last = changes.get(spelling(path), (0, ''))
+                changes[spelling(path)] = (total + (count or 0), max(last, last_access_time or ''))
+            _rewrite(conn, 'sync_local', ('path', 'count', 'last_access_time'),
+                     [(path,) + values for path, values in changes.items()])
+    if 'sync_pins' in tables:
+        rows = conn.execute("SELECT path, is_pinned, stamp, device, seq FROM sync_pins").fetchall()
+        if any(spelling(row[0]) != row[0] for row in rows):
+            pins = {}
+            for path, is_pinned, stamp, device, seq in rows:
+                path = spelling(path)
+                # 最后写入者获胜，与同步合并的规则一致
+                if path not in pins or (stamp, device) > pins[path][2:4]:
+                    pins[path] = (path, is_pinned, stamp, device, seq)
+            _rewrite(conn, 'sync_pins', ('path', 'is_pinned', 'stamp', 'device', 'seq'), list(pins.values()))
+    conn.commit()
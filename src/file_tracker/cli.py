@@ -0,0 +1,170 @@
+"""File Tracker 的命令行入口，只依赖存储层，不导入任何界面库
+
+用法: python -m file_tracker <record|top|search|pin|sweep|export|replay|sync> ...
+"""
+import argparse
+import os
+import sys
+
+from . import storage
+
+
+def _print_rows(rows, long_format):
+    for path, access_count, last_access_time, is_pinned in rows:
+        if long_format:
+            mark = '*' if is_pinned else ' '
+            print(f"{mark} {access_count:>6}  {last_access_time or '':<19}  {path}")
+        else:
+            print(path)
+
+
+def _running_instance(args):
+    from .instance import instance_file
+    return instance_file(args.db or storage.get_db_path())
+
+
+def cmd_record(conn, args):
+    from .instance import notify_running
+    paths = [os.path.abspath(path) for path in args.paths]
+    # 界面正在运行时交给它合并写入，避免两个进程同时写数据库
+    if notify_running(_running_instance(args), *(f"record {path}" for path in paths)):
+        return 0
+    for path in paths:
+        storage.record_path(conn, path)
+    return 0
+
+
+def _refuse_if_running(args):
+    # 界面关闭时会按列表重写整张表，运行期间直接写入数据库的修改会丢失
+    from .instance import notify_running
+    if notify_running(_running_instance(args)):
+        print("File Tracker 正在运行，请在界面中操作或先关闭界面", file=sys.stderr)
+        return True
+    return False
+
+
+def cmd_top(conn, args):
+    order_by = 'last_access_time' if args.by == 'time' else 'access_count'
+    _print_rows(storage.top_paths(conn, args.limit, order_by), args.long)
+    return 0
+
+
+def cmd_search(conn, args):
+    rows = storage.search_paths(conn, args.term, args.limit)
+    _print_rows(rows, args.long)
+    return 0 if rows else 1
+
+
+def cmd_pin(conn, args):
+    from .instance import notify_running
+    paths = [os.path.abspath(path) for path in args.paths]
+    command = 'unpin' if args.off else 'pin'
+    if notify_running(_running_instance(args), *(f"{command} {path}" for path in paths)):
+        return 0
+    status = 0
+    for path in paths:
+        if not storage.set_pinned(conn, path, not args.off):
+            print(f"未找到路径: {path}", file=sys.stderr)
+            status = 1
+    return status
+
+
+def cmd_sweep(conn, args):
+    if not args.dry_run and _refuse_if_running(args):
+        return 2
+    missing = storage.missing_paths(conn)
+    for path in missing:
+        print(path)
+    if not args.dry_run:
+        storage.delete_paths(conn, missing)
+    return 0
+
+
+def cmd_export(conn, args):
+    # 导出模块只在需要时加载
+    from .history_io import export_history, text_progress
+    progress = None if args.quiet else text_progress("导出")
+    export_history(conn, args.file, fmt=args.format, progress=progress)
+    return 0
+
+
+def cmd_replay(conn, args):
+    # 回放模块只在需要时加载
+    from .trace import replay
+    replayer, initial_ok, final_ok = replay(args.trace, conn, args.speed)
+    print(f"{'操作':<8}{'次数':>8}{'平均(ms)':>12}{'p95(ms)':>12}{'最大(ms)':>12}")
+    for op, (count, mean, p95, worst) in replayer.report().items():
+        print(f"{op:<8}{count:>8}{mean * 1000:>12.3f}{p95 * 1000:>12.3f}{worst * 1000:>12.3f}")
+    if initial_ok is False:
+        print("警告: 数据库的初始状态与录制时不同，结果不可比较", file=sys.stderr)
+    for op, ok in replayer.checkpoints:
+        if not ok:
+            print(f"警告: 回放到 {op} 时数据库状态与录制时不同，之后的结果不可比较", file=sys.stderr)
+    if final_ok is not None:
+        print("最终状态一致" if final_ok else "最终状态不一致")
+    return 0 if final_ok is not False else 1
+
+
+def cmd_sync(conn, args):
+    from .sync import HistorySync
+    if _refuse_if_running(args):
+        return 2
+    exported, merged = HistorySync(conn, args.folder).sync()
+    print(f"写出 {exported} 条，合并 {merged} 条")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='file_tracker', description="File Tracker 命令行工具")
+    parser.add_argument('--db', help="数据库文件路径（默认为用户主目录下的 file_tracker.db）")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record = commands.add_parser('record', help="记录一次或多次路径访问")
+    record.add_argument('paths', nargs='+')
+    record.set_defaults(func=cmd_record)
+
+    top = commands.add_parser('top', help="列出最常用（置顶优先）的路径")
+    top.add_argument('-n', '--limit', type=int, default=10)
+    top.add_argument('--by', choices=('count', 'time'), default='count', help="按频次或最后访问时间排序")
+    top.add_argument('-l', '--long', action='store_true', help="同时显示频次、时间与置顶标记")
+    top.set_defaults(func=cmd_top)
+
+    search = commands.add_parser('search', help="按子串查找路径")
+    search.add_argument('term')
+    search.add_argument('-n', '--limit', type=int, default=50)
+    search.add_argument('-l', '--long', action='store_true')
+    search.set_defaults(func=cmd_search)
+
+    pin = commands.add_parser('pin', help="置顶路径")
+    pin.add_argument('paths', nargs='+')
+    pin.add_argument('--off', action='store_true', help="取消置顶")
+    pin.set_defaults(func=cmd_pin)
+
+    sweep = commands.add_parser('sweep', help="删除已失效的路径")
+    sweep.add_argument('--dry-run', action='store_true', help="只列出，不删除")
+    sweep.set_defaults(func=cmd_sweep)
+
+    export = commands.add_parser('export', help="导出记录为 JSONL 或 CSV")
+    export.add_argument('file')
+    export.add_argument('--format', choices=('jsonl', 'csv'))
+    export.add_argument('-q', '--quiet', action='store_true')
+    export.set_defaults(func=cmd_export)
+
+    replay = commands.add_parser('replay', help="在数据库副本上回放操作轨迹并统计耗时")
+    replay.add_argument('trace')
+    replay.add_argument('--speed', type=float, help="按录制节奏的倍速回放（默认不等待）")
+    replay.set_defaults(func=cmd_replay)
+
+    sync = commands.add_parser('sync', help="通过共享文件夹与其他设备合并记录")
+    sync.add_argument('folder')
+    sync.set_defaults(func=cmd_sync)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    conn = storage.connect(args.db)
+    try:
+        return args.func(conn, args)
+    finally:
+        conn.close()
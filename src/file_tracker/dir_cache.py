@@ -0,0 +1,120 @@
+import os
+import stat
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+_HIDDEN = getattr(stat, 'FILE_ATTRIBUTE_HIDDEN', 0)
+
+
+class DirEntry:
+    __slots__ = ('name', 'path', 'is_dir', 'is_hidden')
+
+    def __init__(self, name, path, is_dir, is_hidden):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.is_hidden = is_hidden
+
+
+def scan_directory(path):
+    """用 os.scandir 列出目录，文件夹在前，各自按名称（不区分大小写）排序"""
+    entries = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+                # Windows 上 scandir 已带回属性，不会额外产生 stat 调用
+                attributes = getattr(entry.stat(), 'st_file_attributes', 0) if _HIDDEN else 0
+            except OSError:
+                continue
+            is_hidden = entry.name.startswith('.') or bool(attributes & _HIDDEN)
+            entries.append(DirEntry(entry.name, entry.path, is_dir, is_hidden))
+    entries.sort(key=lambda entry: (not entry.is_dir, entry.name.lower()))
+    return entries
+
+
+class DirectoryLister:
+    """在线程池中枚举目录，并按 (路径, 修改时间) 缓存最近的目录列表（LRU）
+
+    目录内容变化会更新其修改时间，缓存随之失效，因此命中时无需重新枚举。
+    """
+
+    def __init__(self, max_workers=4, max_dirs=512):
+        self.max_dirs = max_dirs
+        self._cache = OrderedDict()   # 路径 -> (修改时间, 条目列表)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='DirectoryLister')
+
+    def cached(self, path):
+        """缓存仍然有效时返回条目列表，否则返回 None"""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        with self._lock:
+            hit = self._cache.get(path)
+            if hit is None or hit[0] != mtime:
+                return None
+            self._cache.move_to_end(path)
+            return hit[1]
+
+    def peek(self, path):
+        """不检查修改时间，直接返回缓存的条目列表（可能已过期），没有时返回 None
+
+        不访问磁盘，可以在界面线程中调用；随后应在后台用 list_dir 确认。
+        """
+        with self._lock:
+            hit = self._cache.get(path)
+            if hit is None:
+                return None
+            self._cache.move_to_end(path)
+            return hit[1]
+
+    def list_dir(self, path):
+        """同步返回目录列表，优先使用缓存"""
+        entries = self.cached(path)
+        if entries is not None:
+            return entries
+        mtime = os.stat(path).st_mtime_ns
+        entries = scan_directory(path)
+        with self._lock:
+            self._cache[path] = (mtime, entries)
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.max_dirs:
+                self._cache.popitem(last=False)
+        return entries
+
+    def submit(self, path, callback):
+        """在后台枚举目录，完成后调用 callback(path, entries, error)"""
+        def task():
+            try:
+                callback(path, self.list_dir(path), None)
+            except OSError as e:
+                callback(path, [], e)
+        return self._executor.submit(task)
+
+    def prefetch(self, paths):
+        """后台预取这些目录及其各级上级目录的列表，使常用路径的展开无需等待"""
+        wanted = []
+        seen = set()
+        for path in paths:
+            while path and path not in seen:
+                seen.add(path)
+                wanted.append(path)
+                parent = os.path.dirname(path)
+                if parent == path:
+                    break
+                path = parent
+        for path in wanted:
+            self._executor.submit(self._prefetch_one, path)
+
+    def _prefetch_one(self, path):
+        try:
+            if os.path.isdir(path):
+                self.list_dir(path)
+        except OSError:
+            pass
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,120 @@
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+
+from .storage import TIME_FORMAT, iter_paths, merge_paths
+
+FIELDS = ('path', 'access_count', 'last_access_time', 'is_pinned')
+
+
+def text_progress(label, stream=None):
+    """无界面时使用的进度回调，在终端同一行刷新百分比"""
+    stream = stream or sys.stderr
+
+    def progress(done, total):
+        percent = 100 * done // total if total else 100
+        stream.write(f"\r{label}: {percent}%")
+        if done >= total:
+            stream.write("\n")
+        stream.flush()
+    return progress
+
+
+def detect_format(file_path):
+    """按扩展名判断格式：.csv 为 CSV，其余按 JSONL 处理"""
+    return 'csv' if file_path.lower().endswith('.csv') else 'jsonl'
+
+
+def export_history(conn, file_path, fmt=None, progress=None, chunk_size=1000):
+    """把全部记录流式写出为 JSONL 或 CSV，返回写出的行数
+
+    progress(已完成, 总数) 每写完一块调用一次。
+    """
+    fmt = fmt or detect_format(file_path)
+    total = conn.execute("SELECT COUNT(*) FROM paths").fetchone()[0]
+    written = 0
+    with open(file_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f) if fmt == 'csv' else None
+        if writer:
+            writer.writerow(FIELDS)
+        for row in iter_paths(conn, chunk_size):
+            if writer:
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False) + '\n')
+            written += 1
+            if progress and written % chunk_size == 0:
+                progress(written, total)
+    if progress:
+        progress(written, total)
+    return written
+
+
+def _read_rows(f, fmt):
+    if fmt == 'csv':
+        for record in csv.DictReader(f):
+            yield record
+    else:
+        for line in f:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    yield None   # 损坏的一行按无效记录跳过，不中断已开始的导入
+
+
+def normalize_time(text):
+    """把时间统一为 TIME_FORMAT；空值返回 ''，无法识别时抛出 ValueError
+
+    最后访问时间按字符串比较先后，格式不一致会使合并与排序出错。
+    """
+    if not text:
+        return ''
+    try:
+        return datetime.strptime(text, TIME_FORMAT).strftime(TIME_FORMAT)
+    except ValueError:
+        # 其他工具常用的 ISO 8601 写法，如 2024-01-02T10:00:00.123
+        return datetime.fromisoformat(text).strftime(TIME_FORMAT)
+
+
+def _parse(record):
+    if not isinstance(record, dict):
+        raise ValueError("无效的记录")
+    path = record.get('path')
+    if not isinstance(path, str) or not path:
+        raise ValueError("缺少路径")
+    access_count = int(record.get('access_count') or 1)
+    if access_count < 0:
+        raise ValueError("访问次数不能为负")
+    return (path, access_count,
+            normalize_time(record.get('last_access_time')), 1 if int(record.get('is_pinned') or 0) else 0)
+
+
+def _tracked(f, records, progress, total, every, skipped):
+    # 按已读取的字节数汇报进度；无法解析的记录跳过并计数
+    for count, record in enumerate(records, 1):
+        if progress and count % every == 0:
+            progress(f.buffer.tell(), total)
+        try:
+            yield _parse(record)
+        except (ValueError, TypeError, AttributeError):
+            skipped[0] += 1
+
+
+def import_history(conn, file_path, fmt=None, progress=None, chunk_size=1000):
+    """流式读取 JSONL 或 CSV 并合并进数据库，返回 (导入的行数, 跳过的行数)
+
+    已存在的路径：次数相加、时间取最新、置顶取并集。缺少路径、次数或时间无法识别的记录被跳过。
+    progress(已读字节数, 文件大小) 定期调用。
+    """
+    fmt = fmt or detect_format(file_path)
+    total = os.path.getsize(file_path)
+    skipped = [0]
+    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+        rows = _tracked(f, _read_rows(f, fmt), progress, total, chunk_size, skipped)
+        imported = merge_paths(conn, rows, chunk_size)
+    if progress:
+        progress(total, total)
+    return imported, skipped[0]
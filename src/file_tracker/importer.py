@@ -0,0 +1,123 @@
+import os
+from datetime import datetime
+from urllib.parse import unquote, urlparse
+from xml.etree.ElementTree import iterparse
+
+from .storage import TIME_FORMAT, upsert_paths
+
+_MIME_NS = '{http://www.freedesktop.org/standards/shared-mime-info}'
+
+
+class RecentSource:
+    """系统“最近使用的文件”来源的接口，各平台实现此类即可接入导入流程"""
+
+    name = None
+
+    def signature(self):
+        """返回来源文件的特征 (如修改时间与大小)，与上次相同时直接跳过解析；不可用时返回 None"""
+        raise NotImplementedError
+
+    def iter_entries(self, since):
+        """流式产出时间戳晚于 since 的 (路径, 时间戳) ；时间戳须能按字符串比较先后"""
+        raise NotImplementedError
+
+
+class XbelSource(RecentSource):
+    """freedesktop 的 recently-used.xbel"""
+
+    name = 'recently-used.xbel'
+
+    def __init__(self, path=None):
+        if path is None:
+            data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser("~"), '.local', 'share')
+            path = os.path.join(data_home, 'recently-used.xbel')
+        self.path = path
+
+    def signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return f"{stat.st_mtime_ns}:{stat.st_size}"
+
+    def iter_entries(self, since):
+        # iterparse 逐个处理 bookmark 元素，处理完即从父元素上摘除，内存占用与文件大小无关
+        parents = []
+        for event, elem in iterparse(self.path, events=('start', 'end')):
+            if event == 'start':
+                parents.append(elem)
+                continue
+            parents.pop()
+            if elem.tag != 'bookmark':
+                continue
+            timestamp = max(elem.get('visited') or '', elem.get('modified') or '', elem.get('added') or '')
+            href = elem.get('href', '')
+            if timestamp and (since is None or timestamp > since) and href.startswith('file://'):
+                path = unquote(urlparse(href).path)
+                mime = elem.find(f'.//{_MIME_NS}mime-type')
+                if mime is None or mime.get('type') != 'inode/directory':
+                    path = os.path.dirname(path)  # 与界面一致，文件记录其所在文件夹
+                yield os.path.normpath(path), timestamp
+            if parents:
+                parents[-1].remove(elem)
+
+
+def default_sources():
+    """当前平台可用的来源"""
+    if os.name == 'posix':
+        return [XbelSource()]
+    return []
+
+
+def _local_time(timestamp):
+    try:
+        return datetime.fromisoformat(timestamp).astimezone().strftime(TIME_FORMAT)
+    except ValueError:
+        return datetime.now().strftime(TIME_FORMAT)
+
+
+def _ensure_checkpoint_table(conn):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS import_checkpoints (
+        source TEXT PRIMARY KEY,
+        signature TEXT,
+        last_seen TEXT
+    )
+    ''')
+
+
+def _checkpointed(entries, checkpoint):
+    # 边写入边推进检查点
+    for path, timestamp in entries:
+        if checkpoint['last_seen'] is None or timestamp > checkpoint['last_seen']:
+            checkpoint['last_seen'] = timestamp
+        yield path, 1, _local_time(timestamp)
+
+
+def import_recent(conn, sources=None, batch_size=500):
+    """把各来源中上次检查点之后的新条目导入 paths 表，返回导入的条目数
+
+    来源文件的特征未变时不做任何解析；否则只处理晚于 last_seen 的条目，
+    并在写入完成后更新检查点。
+    """
+    if sources is None:
+        sources = default_sources()
+    _ensure_checkpoint_table(conn)
+    imported = 0
+    for source in sources:
+        signature = source.signature()
+        if signature is None:
+            continue
+        row = conn.execute("SELECT signature, last_seen FROM import_checkpoints WHERE source = ?",
+                           (source.name,)).fetchone()
+        if row and row[0] == signature:
+            continue
+        checkpoint = {'last_seen': row[1] if row else None}
+        entries = source.iter_entries(checkpoint['last_seen'])
+        imported += upsert_paths(conn, _checkpointed(entries, checkpoint), batch_size)
+        conn.execute('''
+        INSERT INTO import_checkpoints (source, signature, last_seen) VALUES (?, ?, ?)
+        ON CONFLICT(source) DO UPDATE SET signature = excluded.signature, last_seen = excluded.last_seen
+        ''', (source.name, signature, checkpoint['last_seen']))
+        conn.commit()
+    return imported
@@ -0,0 +1,164 @@
+import hmac
+import json
+import os
+import secrets
+import socket
+import threading
+from datetime import datetime
+
+from .canonical import canonical_path
+from .storage import TIME_FORMAT
+
+
+def instance_file(db_path):
+    """记录运行中实例端口与口令的文件，与数据库一一对应"""
+    return db_path + '.instance'
+
+
+def notify_running(instance_path, *messages, timeout=1.0):
+    """把消息发给正在运行的实例，实例处理完并回复 'ok' 时返回 True
+
+    消息每条一行，例如 'raise' 或 'record <路径>'。端口文件可能是崩溃的实例留下的，
+    端口也可能已被其他程序占用，因此只有收到确认才算送达。
+    """
+    try:
+        with open(instance_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        with socket.create_connection(('127.0.0.1', info['port']), timeout) as sock:
+            sock.sendall(('\n'.join((info['token'],) + messages) + '\n').encode('utf-8'))
+            sock.shutdown(socket.SHUT_WR)
+            with sock.makefile('rb') as stream:
+                return stream.readline().strip() == b'ok'
+    except (OSError, ValueError, KeyError):
+        return False
+
+
+class InstanceServer:
+    """单实例的本地通道：监听 127.0.0.1 上的随机端口，端口与口令写入 instance_path
+
+    收到 'raise' 时调用 on_raise()；'record <路径>' 按路径合并，每隔 flush_interval 秒
+    以 [(路径, 次数, 最后时间)] 调用一次 on_records；'pin <路径>'、'unpin <路径>' 调用
+    on_pin(路径, 是否置顶)。回调都在后台线程中调用。
+    """
+
+    def __init__(self, instance_path, on_raise=None, on_records=None, flush_interval=0.5, on_pin=None):
+        self.instance_path = instance_path
+        self.on_raise = on_raise
+        self.on_records = on_records
+        self.on_pin = on_pin
+        self.flush_interval = flush_interval
+        self.token = secrets.token_hex(16)
+        self._pending = {}   # 路径 -> [次数, 最后时间]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._sock = None
+        self._threads = []
+        self._handlers = set()   # 正在读取的连接线程
+        self._wake_address = None
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.bind(('127.0.0.1', 0))
+        self._sock.listen(64)
+        info = {'port': self._sock.getsockname()[1], 'token': self.token, 'pid': os.getpid()}
+        with open(self.instance_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        os.replace(self.instance_path + '.tmp', self.instance_path)
+        self._threads = [threading.Thread(target=self._serve, name='InstanceServer', daemon=True),
+                         threading.Thread(target=self._run_flush, name='InstanceFlush', daemon=True)]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self):
+        """停止监听并删除属于本实例的端口文件，返回尚未交出的记录"""
+        if self._sock is None:
+            return []
+        self._stop.set()
+        # 阻塞中的 accept 不会因关闭套接字而可靠地返回，改为连接自己一次：
+        # 在这次连接之前排队的连接仍会被依次处理，不会丢失记录
+        wake = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            wake.bind(('127.0.0.1', 0))
+            self._wake_address = wake.getsockname()
+            wake.connect(self._sock.getsockname())
+        except OSError:
+            pass
+        finally:
+            wake.close()
+        for thread in self._threads:
+            thread.join(2.0)
+        # 等待已建立的连接读完，发送方写完即关闭连接，通常立即结束
+        with self._lock:
+            handlers = list(self._handlers)
+        for thread in handlers:
+            thread.join(1.0)
+        self._sock.close()
+        self._sock = None
+        try:
+            with open(self.instance_path, 'r', encoding='utf-8') as f:
+                if json.load(f).get('token') == self.token:
+                    os.remove(self.instance_path)
+        except (OSError, ValueError):
+            pass
+        return self.take()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, address = self._sock.accept()
+            except OSError:
+                return
+            if self._stop.is_set() and address == self._wake_address:
+                conn.close()
+                return
+            thread = threading.Thread(target=self._handle, args=(conn,), daemon=True)
+            with self._lock:
+                self._handlers.add(thread)
+            thread.start()
+
+    def _handle(self, conn):
+        try:
+            with conn, conn.makefile('rb') as stream:
+                if self.handle_stream(stream):
+                    conn.sendall(b'ok\n')
+        except OSError:
+            pass
+        finally:
+            with self._lock:
+                self._handlers.discard(threading.current_thread())
+
+    def handle_stream(self, stream):
+        """处理一个连接发来的全部消息，口令正确时返回 True"""
+        if not hmac.compare_digest(stream.readline().strip(), self.token.encode('ascii')):
+            return False
+        for line in stream:
+            command, _, argument = line.decode('utf-8', 'replace').rstrip('\r\n').partition(' ')
+            if command == 'raise' and self.on_raise:
+                self.on_raise()
+            elif command == 'record' and os.path.isabs(argument):
+                self.add(canonical_path(argument))
+            elif command in ('pin', 'unpin') and os.path.isabs(argument) and self.on_pin:
+                self.on_pin(canonical_path(argument), command == 'pin')
+        return True
+
+    def add(self, path, now=None):
+        now = now or datetime.now().strftime(TIME_FORMAT)
+        with self._lock:
+            entry = self._pending.setdefault(path, [0, now])
+            entry[0] += 1
+            entry[1] = max(entry[1], now)
+
+    def take(self):
+        """取出已合并的记录 [(路径, 次数, 最后时间)]"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return [(path, count, last) for path, (count, last) in pending.items()]
+
+    def flush(self):
+        rows = self.take()
+        if rows and self.on_records:
+            self.on_records(rows)
+
+    def _run_flush(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
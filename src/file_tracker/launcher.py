@@ -0,0 +1,112 @@
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .canonical import path_key
+
+
+class CommandBackend:
+    """用外部命令打开文件夹，参数以列表传递，不经过 shell"""
+
+    def __init__(self, command):
+        self.command = command
+
+    def launch(self, folder):
+        return subprocess.Popen([self.command, folder])
+
+
+class StubBackend:
+    """只记录打开过的文件夹，供测试使用"""
+
+    def __init__(self):
+        self.launched = []
+
+    def launch(self, folder):
+        self.launched.append(folder)
+        return None
+
+
+def default_backend():
+    if os.name == 'nt':
+        return CommandBackend('explorer')
+    if sys.platform == 'darwin':
+        return CommandBackend('open')
+    return CommandBackend('xdg-open')
+
+
+class FolderLauncher:
+    """在后台线程中打开文件夹
+
+    短时间内重复打开同一文件夹（例如连续双击，或先后打开文件夹与其中的文件）只执行一次；
+    已退出的子进程会被回收；每次打开的耗时记录在 latencies 中（秒）。
+    """
+
+    def __init__(self, backend=None, dedupe_window=0.5, max_workers=2, on_missing=None, on_error=None):
+        self.backend = backend or default_backend()
+        self.dedupe_window = dedupe_window
+        self.on_missing = on_missing
+        self.on_error = on_error
+        self.latencies = deque(maxlen=100)
+        self._recent = {}      # 路径或文件夹的键 -> 上次请求时间
+        self._children = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='FolderLauncher')
+
+    def open(self, path):
+        """请求打开 path（文件则打开其所在文件夹），被去重时返回 None，否则返回 Future
+
+        文件所在的文件夹刚被打开过时，Future 的结果为 None。
+        """
+        now = time.monotonic()
+        if not self._claim(path_key(path), now):
+            return None
+        return self._executor.submit(self._launch, path, now)
+
+    def _claim(self, key, now):
+        # 去重窗口内已请求过同一键时返回 False，否则记下本次请求
+        with self._lock:
+            last = self._recent.get(key)
+            if last is not None and now - last < self.dedupe_window:
+                return False
+            self._recent[key] = now
+            if len(self._recent) > 256:
+                self._recent = {k: t for k, t in self._recent.items() if now - t < self.dedupe_window}
+        return True
+
+    def _launch(self, path, requested):
+        folder = os.path.dirname(path) if os.path.isfile(path) else path
+        # 判断是否为文件需要访问磁盘，因此在后台线程中按实际打开的文件夹再去重一次
+        if folder != path and not self._claim(path_key(folder), requested):
+            return None
+        if not os.path.isdir(folder):
+            if self.on_missing:
+                self.on_missing(path)
+            return None
+        try:
+            child = self.backend.launch(folder)
+        except OSError as e:
+            if self.on_error:
+                self.on_error(path, e)
+            return None
+        self.latencies.append(time.monotonic() - requested)
+        with self._lock:
+            self._children = [c for c in self._children if c.poll() is None]  # 回收已退出的子进程
+            if child is not None:
+                self._children.append(child)
+        return folder
+
+    def stats(self):
+        """返回 (次数, 平均耗时, 最大耗时)"""
+        latencies = list(self.latencies)
+        if not latencies:
+            return 0, 0.0, 0.0
+        return len(latencies), sum(latencies) / len(latencies), max(latencies)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+        with self._lock:
+            self._children = [c for c in self._children if c.poll() is None]
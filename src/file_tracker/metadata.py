@@ -0,0 +1,133 @@
+import os
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .storage import TIME_FORMAT
+
+
+class FileInfo:
+    __slots__ = ('size', 'mtime', 'is_dir')
+
+    def __init__(self, size, mtime, is_dir):
+        self.size = size
+        self.mtime = mtime
+        self.is_dir = is_dir
+
+
+MISSING = FileInfo(None, None, False)   # 已确认不存在的路径
+
+
+def stat_path(path):
+    """对单个路径调用一次 os.stat，不存在或无权访问时返回 MISSING"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return MISSING
+    is_dir = stat.S_ISDIR(st.st_mode)
+    return FileInfo(None if is_dir else st.st_size, st.st_mtime, is_dir)
+
+
+def format_size(size):
+    if size is None:
+        return ''
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_mtime(info):
+    return time.strftime(TIME_FORMAT, time.localtime(info.mtime)) if info.mtime is not None else ''
+
+
+def file_type(path, info):
+    if info is MISSING:
+        return '已失效'
+    if info.is_dir:
+        return '文件夹'
+    extension = os.path.splitext(path)[1].lstrip('.')
+    return f"{extension.upper()} 文件" if extension else '文件'
+
+
+class MetadataCache:
+    """按需获取路径的大小、修改时间和类型，结果带有效期缓存（LRU）
+
+    界面只为可见行调用 request，已缓存或正在获取的路径不会重复 stat，
+    因此 stat 次数只与实际显示过的行数有关，与记录总数无关。
+    """
+
+    def __init__(self, ttl=30, max_entries=4096, max_workers=2, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stat_count = 0
+        self._cache = OrderedDict()   # 路径 -> (过期时刻, FileInfo)
+        self._pending = set()
+        self._generation = 0          # 每次失效加一，丢弃失效前发起的结果
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='MetadataCache')
+
+    def get(self, path):
+        """缓存未过期时返回 FileInfo（可能是 MISSING），否则返回 None"""
+        with self._lock:
+            hit = self._cache.get(path)
+            if hit is None or hit[0] <= self.clock():
+                return None
+            self._cache.move_to_end(path)
+            return hit[1]
+
+    def request(self, paths, callback):
+        """在后台为尚未缓存的路径批量 stat，完成后调用 callback({路径: FileInfo})
+
+        返回实际提交的路径数。
+        """
+        now = self.clock()
+        with self._lock:
+            wanted = []
+            for path in paths:
+                hit = self._cache.get(path)
+                if path in self._pending or (hit is not None and hit[0] > now):
+                    continue
+                self._pending.add(path)
+                wanted.append(path)
+            generation = self._generation
+        if wanted:
+            self._executor.submit(self._fetch, wanted, generation, callback)
+        return len(wanted)
+
+    def _fetch(self, paths, generation, callback):
+        results = {}
+        for path in paths:
+            results[path] = stat_path(path)
+        with self._lock:
+            self.stat_count += len(paths)
+            self._pending.difference_update(paths)
+            if generation != self._generation:
+                return  # 期间有路径失效，结果可能已过时，交由下一次请求重新获取
+            expires = self.clock() + self.ttl
+            for path, info in results.items():
+                self._cache[path] = (expires, info)
+                self._cache.move_to_end(path)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        callback(results)
+
+    def invalidate(self, path):
+        """使该路径及其下所有路径的缓存失效"""
+        prefix = path.rstrip('\\/')
+        with self._lock:
+            self._generation += 1
+            for cached in [p for p in self._cache
+                           if p == prefix or (p.startswith(prefix) and p[len(prefix)] in '\\/')]:
+                del self._cache[cached]
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,170 @@
+import os
+import re
+
+# 同时兼容 Windows 与 POSIX 分隔符
+_SEP_RE = re.compile(r'[\\/]+')
+
+
+def split_path(path):
+    """把路径拆分成逐级的组件元组，作为前缀树的键"""
+    path = os.path.normcase(path)
+    parts = [part for part in _SEP_RE.split(path) if part]
+    if path[:2] in ('\\\\', '//'):
+        parts.insert(0, '//')  # UNC 网络路径
+    elif path[:1] in ('\\', '/'):
+        parts.insert(0, '/')
+    return tuple(parts)
+
+
+def _later(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a if a >= b else b
+
+
+class TrieNode:
+    __slots__ = ('key', 'parent', 'children', 'path', 'own_count', 'own_last', 'count', 'last_access')
+
+    def __init__(self, key, parent):
+        self.key = key
+        self.parent = parent
+        self.children = {}
+        self.path = None         # 仅被记录的节点保存原始路径
+        self.own_count = 0
+        self.own_last = None
+        self.count = 0           # 子树访问次数总和
+        self.last_access = None  # 子树最后访问时间
+
+    @property
+    def is_recorded(self):
+        return self.path is not None
+
+
+class PathTrie:
+    """按路径组件组织的前缀树，增量维护每个子树的访问次数总和与最后访问时间
+
+    每次记录或删除只更新从根到该节点的一条链，复杂度为 O(深度)；
+    任意节点的汇总值直接存放在节点上，查询为 O(1)。
+    """
+
+    def __init__(self):
+        self.root = TrieNode((), None)
+        self._index = {(): self.root}
+
+    @classmethod
+    def from_rows(cls, rows):
+        """由 (path, access_count, last_access_time) 行构建前缀树"""
+        trie = cls()
+        for path, access_count, last_access_time in rows:
+            trie.add(path, access_count, last_access_time)
+        return trie
+
+    def __len__(self):
+        return sum(1 for node in self._index.values() if node.is_recorded)
+
+    def __contains__(self, path):
+        node = self._index.get(split_path(path))
+        return node is not None and node.is_recorded
+
+    def clear(self):
+        self.root = TrieNode((), None)
+        self._index = {(): self.root}
+
+    def node(self, path):
+        return self._index.get(split_path(path))
+
+    def totals(self, path):
+        """返回路径所在子树的 (访问次数总和, 最后访问时间)"""
+        node = self._index.get(split_path(path))
+        if node is None:
+            return 0, None
+        return node.count, node.last_access
+
+    def heat(self, path):
+        """子树访问次数占全部访问次数的比例 (0~1)"""
+        if not self.root.count:
+            return 0.0
+        return self.totals(path)[0] / self.root.count
+
+    def add(self, path, count=1, last_access=None):
+        """记录一次（或 count 次）访问，沿途更新各级汇总值"""
+        key = split_path(path)
+        node = self.root
+        self._bump(node, count, last_access)
+        for depth in range(1, len(key) + 1):
+            child = node.children.get(key[depth - 1])
+            if child is None:
+                child = TrieNode(key[:depth], node)
+                node.children[key[depth - 1]] = child
+                self._index[child.key] = child
+            node = child
+            self._bump(node, count, last_access)
+        node.path = path
+        node.own_count += count
+        node.own_last = _later(node.own_last, last_access)
+        return node
+
+    def remove(self, path):
+        """删除一条记录，返回是否确实删除"""
+        node = self._index.get(split_path(path))
+        if node is None or not node.is_recorded:
+            return False
+        removed = node.own_count
+        node.path = None
+        node.own_count = 0
+        node.own_last = None
+        while node is not None:
+            node.count -= removed
+            # 最大值无法直接减去，只能从本节点与直接子节点中重新取
+            latest = node.own_last
+            for child in node.children.values():
+                latest = _later(latest, child.last_access)
+            node.last_access = latest
+            parent = node.parent
+            if parent is not None and not node.is_recorded and not node.children:
+                del parent.children[node.key[-1]]
+                del self._index[node.key]
+            node = parent
+        return True
+
+    def records_under(self, path):
+        """遍历某路径（含自身）下所有被记录的节点"""
+        start = self._index.get(split_path(path))
+        if start is None:
+            return
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            if node.is_recorded:
+                yield node
+            stack.extend(node.children.values())
+
+    def move(self, old_path, new_path):
+        """把 old_path 及其下所有记录移动到 new_path，保留访问次数与时间"""
+        moved = [(node.path, node.own_count, node.own_last) for node in self.records_under(old_path)]
+        prefix_len = len(old_path.rstrip('\\/'))
+        for path, count, last_access in moved:
+            self.remove(path)
+        for path, count, last_access in moved:
+            self.add(new_path.rstrip('\\/') + path[prefix_len:], count, last_access)
+        return len(moved)
+
+    def group_by_parent(self, paths):
+        """把记录按上级目录分组，返回 [(上级目录, 子树访问次数, 最后访问时间)]，按次数降序"""
+        parents = {}
+        for path in paths:
+            parent = os.path.dirname(path.rstrip('\\/')) or path
+            parents.setdefault(split_path(parent), parent)
+        groups = []
+        for key, parent in parents.items():
+            node = self._index.get(key)
+            if node is not None:
+                groups.append((parent, node.count, node.last_access))
+        groups.sort(key=lambda group: group[1], reverse=True)
+        return groups
+
+    def _bump(self, node, count, last_access):
+        node.count += count
+        node.last_access = _later(node.last_access, last_access)
@@ -0,0 +1,109 @@
+import threading
+from datetime import datetime, timedelta
+
+from .storage import TIME_FORMAT, connect
+
+
+class RetentionPolicy:
+    """历史记录的保留策略（置顶路径永远保留）
+
+    max_rows: 记录总数上限，超出时淘汰最冷（频次最低、其次最久未访问）的记录
+    max_age_days: 超过这么多天未访问、且访问次数低于 min_count 的记录会被淘汰
+    max_rows 或 max_age_days 为 None 表示不限制；默认都不限制，淘汰须在配置中开启。
+    """
+
+    def __init__(self, max_rows=None, max_age_days=None, min_count=5):
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+        self.min_count = min_count
+
+    @classmethod
+    def from_config(cls, config):
+        policy = cls()
+        for name in ('max_rows', 'max_age_days', 'min_count'):
+            if name in config:
+                setattr(policy, name, config[name])
+        return policy
+
+    @property
+    def enabled(self):
+        return self.max_rows is not None or self.max_age_days is not None
+
+
+def evict_batch(conn, policy, batch_size=200, now=None):
+    """按策略删除至多 batch_size 条未置顶记录，返回被删除的路径"""
+    victims = []
+    if policy.max_age_days is not None:
+        cutoff = ((now or datetime.now()) - timedelta(days=policy.max_age_days)).strftime(TIME_FORMAT)
+        min_count = policy.min_count if policy.min_count is not None else float('inf')
+        victims = conn.execute(
+            "SELECT id, path FROM paths WHERE is_pinned = 0 AND last_access_time < ? AND access_count < ? LIMIT ?",
+            (cutoff, min_count, batch_size)).fetchall()
+    if not victims and policy.max_rows is not None:
+        excess = conn.execute("SELECT COUNT(*) FROM paths").fetchone()[0] - policy.max_rows
+        if excess > 0:
+            # 沿 (is_pinned, access_count, last_access_time) 索引从最冷的一端取
+            victims = conn.execute(
+                "SELECT id, path FROM paths WHERE is_pinned = 0 "
+                "ORDER BY access_count, last_access_time LIMIT ?",
+                (min(excess, batch_size),)).fetchall()
+    if victims:
+        conn.executemany("DELETE FROM paths WHERE id = ?", [(row_id,) for row_id, _ in victims])
+        conn.commit()
+    return [path for _, path in victims]
+
+
+class Evictor:
+    """后台分批执行保留策略：每批之间稍作停顿，使单次写锁时间很短
+
+    on_evicted(paths) 在后台线程中调用。
+    """
+
+    def __init__(self, db_path, policy, on_evicted=None, interval=600, batch_size=200, pause=0.05):
+        self.db_path = db_path
+        self.policy = policy
+        self.on_evicted = on_evicted
+        self.interval = interval
+        self.batch_size = batch_size
+        self.pause = pause
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='Evictor', daemon=True)
+            self._thread.start()
+
+    def kick(self):
+        """提前执行一轮"""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def run_once(self):
+        conn = connect(self.db_path)
+        evicted = 0
+        try:
+            while not self._stop.is_set():
+                paths = evict_batch(conn, self.policy, self.batch_size)
+                evicted += len(paths)
+                if paths and self.on_evicted:
+                    self.on_evicted(paths)
+                if len(paths) < self.batch_size:
+                    break
+                self._stop.wait(self.pause)
+        finally:
+            conn.close()
+        return evicted
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
@@ -0,0 +1,74 @@
+from bisect import bisect_left
+
+
+class SortedPathModel:
+    """按频次或时间降序维护的内存路径列表
+
+    查找与定位都用二分完成；每次变更前可以用 position_for 得到变更前后的行号，
+    供 Qt 等视图在修改前发出 beginInsertRows / beginMoveRows 之类的细粒度信号。
+    时间须为数值（如 time.time() 的返回值）。
+    """
+
+    def __init__(self, order_by='access_count'):
+        self.order_by = order_by
+        self.records = {}   # 路径 -> (访问次数, 最后访问时间)
+        self.keys = []      # 已排序的排序键
+
+    def __len__(self):
+        return len(self.keys)
+
+    def __contains__(self, path):
+        return path in self.records
+
+    def _key(self, path, access_count, last_access_time):
+        last_access_time = last_access_time or 0
+        if self.order_by == 'access_count':
+            return (-access_count, -last_access_time, path)
+        return (-last_access_time, -access_count, path)
+
+    def load(self, rows):
+        """由 (path, access_count, last_access_time) 行整体重建"""
+        self.records = {path: (access_count, last_access_time) for path, access_count, last_access_time in rows}
+        self.keys = sorted(self._key(path, *record) for path, record in self.records.items())
+
+    def set_order(self, order_by):
+        self.order_by = order_by
+        self.keys = sorted(self._key(path, *record) for path, record in self.records.items())
+
+    def path_at(self, row):
+        return self.keys[row][2]
+
+    def record_at(self, row):
+        path = self.keys[row][2]
+        return (path,) + self.records[path]
+
+    def row_of(self, path):
+        """路径所在行号，不存在时返回 -1"""
+        if path not in self.records:
+            return -1
+        return bisect_left(self.keys, self._key(path, *self.records[path]))
+
+    def position_for(self, path, access_count, last_access_time):
+        """返回 (原行号或 -1, 更新后的行号)，不修改列表"""
+        old_row = self.row_of(path)
+        new_row = bisect_left(self.keys, self._key(path, access_count, last_access_time))
+        if old_row != -1 and new_row > old_row:
+            new_row -= 1  # 原行移除后，其后的行号都会前移一位
+        return old_row, new_row
+
+    def update(self, path, access_count, last_access_time):
+        """插入或更新一条记录，返回 (原行号或 -1, 新行号)"""
+        old_row, new_row = self.position_for(path, access_count, last_access_time)
+        if old_row != -1:
+            del self.keys[old_row]
+        self.records[path] = (access_count, last_access_time)
+        self.keys.insert(new_row, self._key(path, access_count, last_access_time))
+        return old_row, new_row
+
+    def remove(self, path):
+        """删除一条记录，返回原行号（不存在时为 -1）"""
+        row = self.row_of(path)
+        if row != -1:
+            del self.keys[row]
+            del self.records[path]
+        return row
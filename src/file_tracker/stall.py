@@ -0,0 +1,115 @@
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from logging.handlers import RotatingFileHandler
+
+logger = logging.getLogger('file_tracker.stall')
+logger.propagate = False
+
+
+def is_enabled(env_value, config_value=False):
+    """环境变量（如 FILE_TRACKER_WATCHDOG）设置时以它为准，只有 1/true/yes/on 表示开启；否则看配置项"""
+    if env_value is not None and env_value.strip():
+        return env_value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(config_value)
+
+
+def sample_stack(thread_id):
+    """返回线程当前的 Python 调用栈 ((文件, 行号, 函数), ...)，最外层在前"""
+    frame = sys._current_frames().get(thread_id)
+    stack = []
+    while frame is not None:
+        stack.append((frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name))
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+def format_frame(frame):
+    filename, lineno, name = frame
+    return f'{filename}:{lineno} in {name}'
+
+
+class StallMonitor:
+    """监视界面事件循环的卡顿（需主动开启）
+
+    后台线程每隔 interval 秒通过 post（如 wx.CallAfter）投递一次心跳；心跳超过 threshold 秒
+    仍未执行时，每隔 sample_interval 秒采样一次界面线程的调用栈，直到事件循环恢复，
+    再把这次卡顿最常见的调用栈与累计最常见的卡顿位置写入滚动日志。
+    不卡顿时每个周期只有一次投递，没有任何采样。
+    """
+
+    def __init__(self, post, report_path, threshold=0.5, interval=0.25, sample_interval=0.02,
+                 long_stall=10.0, max_bytes=1 << 20, backup_count=3, thread_id=None):
+        self.post = post
+        self.report_path = report_path
+        self.threshold = threshold
+        self.interval = interval
+        self.sample_interval = sample_interval
+        self.long_stall = long_stall
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.thread_id = thread_id or threading.main_thread().ident
+        self.stalls = 0
+        self.top_frames = Counter()   # 最内层帧 -> 累计采样次数
+        self._stop = threading.Event()
+        self._thread = None
+        self._handler = None
+
+    def start(self):
+        if self._thread is None:
+            self._handler = RotatingFileHandler(self.report_path, maxBytes=self.max_bytes,
+                                                backupCount=self.backup_count, encoding='utf-8')
+            self._handler.setFormatter(logging.Formatter('[%(asctime)s] %(message)s'))
+            logger.addHandler(self._handler)
+            logger.setLevel(logging.INFO)
+            self._thread = threading.Thread(target=self._run, name='StallMonitor', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            logger.removeHandler(self._handler)
+            self._handler.close()
+
+    def _run(self):
+        while not self._stop.is_set():
+            pong = threading.Event()
+            sent = time.monotonic()
+            self.post(pong.set)
+            if not pong.wait(self.threshold) and not self._stop.is_set():
+                self._sample_until(pong, sent)
+            self._stop.wait(self.interval)
+
+    def _sample_until(self, pong, sent):
+        stacks = Counter()
+        reported = False
+        while True:
+            stack = sample_stack(self.thread_id)
+            if stack:
+                stacks[stack] += 1
+            if pong.wait(self.sample_interval) or self._stop.is_set():
+                break
+            if not reported and time.monotonic() - sent > self.long_stall:
+                # 长时间未恢复（可能已死锁）时先写一份，以免进程被强制结束后什么也没留下
+                self._report(time.monotonic() - sent, stacks, ongoing=True)
+                reported = True
+        self.stalls += 1
+        for stack, count in stacks.items():
+            self.top_frames[stack[-1]] += count
+        self._report(time.monotonic() - sent, stacks)
+
+    def _report(self, duration, stacks, ongoing=False):
+        samples = sum(stacks.values())
+        lines = [f"事件循环{'仍在' if ongoing else ''}卡顿 {duration:.2f} 秒（采样 {samples} 次）"]
+        if stacks:
+            stack, count = stacks.most_common(1)[0]
+            lines.append(f"最常见的调用栈（{count}/{samples}）:")
+            lines.extend('    ' + format_frame(frame) for frame in stack)
+        if not ongoing and self.top_frames:
+            lines.append(f"累计最常见的卡顿位置（共 {self.stalls} 次卡顿）:")
+            lines.extend(f"    {count:>6}  {format_frame(frame)}" for frame, count in self.top_frames.most_common(10))
+        logger.info('\n'.join(lines))
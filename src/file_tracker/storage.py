@@ -0,0 +1,237 @@
+import os
+import sqlite3
+import time
+from datetime import datetime
+
+from .canonical import CASE_INSENSITIVE, canonical_path, merge_duplicates
+
+# 与界面中显示的最后访问时间格式一致
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def get_db_path():
+    """获取数据库文件的路径"""
+    return os.environ.get('FILE_TRACKER_DB') or os.path.join(os.path.expanduser("~"), "file_tracker.db")
+
+
+def connect(db_path=None):
+    """打开数据库并确保表结构存在"""
+    conn = sqlite3.connect(db_path or get_db_path())
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS paths (
+        id INTEGER PRIMARY KEY,
+        path TEXT UNIQUE,
+        access_count INTEGER DEFAULT 1,
+        last_access_time TEXT,
+        is_pinned INTEGER DEFAULT 0
+    )
+    ''')
+    # 按频次、时间排序的索引
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_paths_access_count ON paths (access_count)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_paths_last_access_time ON paths (last_access_time)")
+    # 保留策略按此顺序淘汰最冷的未置顶记录
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_paths_coldness ON paths (is_pinned, access_count, last_access_time)")
+    if CASE_INSENSITIVE:
+        # 写入时按此索引查找只差大小写的已有写法
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_paths_nocase ON paths (path COLLATE NOCASE)")
+    conn.commit()
+    # 旧版本写入的路径写法不统一（大小写、分隔符、末尾斜杠），首次打开时合并一次；
+    # 版本 2 起同步与转移模型表中的路径也一并合并
+    if conn.execute("PRAGMA user_version").fetchone()[0] < 2:
+        merge_duplicates(conn)
+        conn.execute("PRAGMA user_version = 2")
+        conn.commit()
+    return conn
+
+
+def _later(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a if a >= b else b
+
+
+def _execute_batched(conn, sql, rows, batch_size, on_batch=None):
+    # 分块 executemany，每块提交一次；on_batch(cursor, batch) 在同一事务中处理同一块
+    cursor = conn.cursor()
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            cursor.executemany(sql, batch)
+            if on_batch:
+                on_batch(cursor, batch)
+            conn.commit()
+            total += len(batch)
+            batch = []
+    if batch:
+        cursor.executemany(sql, batch)
+        if on_batch:
+            on_batch(cursor, batch)
+        conn.commit()
+        total += len(batch)
+    return total
+
+
+def _local_changes(conn):
+    # 开启同步后存在 sync_local 表：本机写入的访问增量同时记入该表，同步时计入本机计数器
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sync_local'").fetchone() is None:
+        return None
+    sql = '''
+    INSERT INTO sync_local (path, count, last_access_time)
+    VALUES (?, ?, ?)
+    ON CONFLICT(path) DO UPDATE SET
+    count = count + excluded.count,
+    last_access_time = max(ifnull(last_access_time, ''), excluded.last_access_time)
+    '''
+    return lambda cursor, batch: cursor.executemany(sql, [row[:3] for row in batch])
+
+
+def _existing_spellings(conn, rows):
+    # 不区分大小写的平台上沿用表中已有的写法，只差大小写的访问写入同一行；
+    # NOCASE 只折叠 ASCII 字母，候选再按 lower() 确认，与 os.path.normcase 一致
+    if not CASE_INSENSITIVE:
+        yield from rows
+        return
+    spellings = {}
+    for path, *rest in rows:
+        folded = path.lower()
+        if folded not in spellings:
+            spellings[folded] = path
+            for (existing,) in conn.execute("SELECT path FROM paths WHERE path = ? COLLATE NOCASE", (path,)):
+                if existing.lower() == folded:
+                    spellings[folded] = existing
+                    break
+        yield (spellings[folded], *rest)
+
+
+def canonical_rows(conn, rows):
+    """把各行第一列的路径规范化，并沿用表中已有的写法；所有写入 paths 的来源都应经过这里"""
+    return _existing_spellings(conn, ((canonical_path(path), *rest) for path, *rest in rows))
+
+
+def upsert_paths(conn, rows, batch_size=500):
+    """批量记录访问：(path, access_count, last_access_time) 行累加次数、取最新时间
+
+    路径先规范化并沿用已有的大小写写法，同一路径的不同写法写入同一行；返回写入的行数。
+    """
+    sql = '''
+    INSERT INTO paths (path, access_count, last_access_time)
+    VALUES (?, ?, ?)
+    ON CONFLICT(path) DO UPDATE SET
+    access_count = access_count + excluded.access_count,
+    last_access_time = max(ifnull(last_access_time, ''), excluded.last_access_time)
+    '''
+    return _execute_batched(conn, sql, canonical_rows(conn, rows), batch_size, _local_changes(conn))
+
+
+def record_path(conn, path, now=None):
+    """记录一次访问"""
+    now = now or datetime.now().strftime(TIME_FORMAT)
+    upsert_paths(conn, [(path, 1, now)])
+    return now
+
+
+def top_paths(conn, limit=10, order_by='access_count'):
+    """置顶路径在前，其余按频次或时间降序"""
+    if order_by not in ('access_count', 'last_access_time'):
+        raise ValueError(f"无效的排序字段: {order_by}")
+    return conn.execute(
+        "SELECT path, access_count, last_access_time, is_pinned FROM paths "
+        f"ORDER BY is_pinned DESC, {order_by} DESC LIMIT ?", (limit,)).fetchall()
+
+
+def search_paths(conn, term, limit=50):
+    """按子串（不区分大小写）查找路径，按频次降序"""
+    pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+    return conn.execute(
+        "SELECT path, access_count, last_access_time, is_pinned FROM paths "
+        "WHERE path LIKE ? ESCAPE '\\' ORDER BY access_count DESC LIMIT ?", (pattern, limit)).fetchall()
+
+
+def set_pinned(conn, path, pinned=True, now=None):
+    """设置或取消置顶，返回路径是否存在
+
+    开启同步后同时记下变化发生的时刻（time.time() 秒数），其他设备据此判断先后。
+    """
+    (path,), = canonical_rows(conn, [(path,)])
+    cursor = conn.execute("UPDATE paths SET is_pinned = ? WHERE path = ?", (1 if pinned else 0, path))
+    if cursor.rowcount and conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sync_pin_stamps'").fetchone():
+        conn.execute("INSERT OR REPLACE INTO sync_pin_stamps (path, stamp) VALUES (?, ?)", (path, now or time.time()))
+    conn.commit()
+    return cursor.rowcount > 0
+
+
+def delete_paths(conn, paths):
+    """删除多条记录"""
+    conn.executemany("DELETE FROM paths WHERE path = ?", [(path,) for path in paths])
+    conn.commit()
+
+
+def missing_paths(conn, exists=os.path.exists):
+    """找出已经不存在的路径"""
+    return [path for path, _, _, _ in iter_paths(conn) if not exists(path)]
+
+
+def merge_paths(conn, rows, batch_size=1000):
+    """合并其他来源的完整记录：(path, access_count, last_access_time, is_pinned)
+
+    次数相加、时间取最新、置顶取并集，返回写入的行数。
+    """
+    sql = '''
+    INSERT INTO paths (path, access_count, last_access_time, is_pinned)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(path) DO UPDATE SET
+    access_count = access_count + excluded.access_count,
+    last_access_time = max(ifnull(last_access_time, ''), excluded.last_access_time),
+    is_pinned = max(is_pinned, excluded.is_pinned)
+    '''
+    return _execute_batched(conn, sql, canonical_rows(conn, rows), batch_size, _local_changes(conn))
+
+
+def iter_paths(conn, chunk_size=1000):
+    """用 fetchmany 逐块读取全部记录，内存占用与记录数无关"""
+    cursor = conn.cursor()
+    cursor.execute("SELECT path, access_count, last_access_time, is_pinned FROM paths ORDER BY id")
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def rename_path_prefix(conn, old_path, new_path):
+    """把 old_path 及其下所有路径改名为 new_path，保留访问次数；新路径已存在时合并记录
+
+    返回 [(旧路径, 新路径)] 列表。
+    """
+    old_path = old_path.rstrip('\\/')
+    new_path = new_path.rstrip('\\/')
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT path, access_count, last_access_time, is_pinned FROM paths "
+        "WHERE path = ? OR substr(path, 1, ?) IN (?, ?)",
+        (old_path, len(old_path) + 1, old_path + '\\', old_path + '/'))
+    renamed = []
+    for path, access_count, last_access_time, is_pinned in cursor.fetchall():
+        target = new_path + path[len(old_path):]
+        cursor.execute("SELECT access_count, last_access_time, is_pinned FROM paths WHERE path = ?", (target,))
+        existing = cursor.fetchone()
+        try:
+            if existing:
+                cursor.execute(
+                    "UPDATE paths SET access_count = ?, last_access_time = ?, is_pinned = ? WHERE path = ?",
+                    (existing[0] + access_count, _later(existing[1], last_access_time),
+                     max(existing[2], is_pinned), target))
+                cursor.execute("DELETE FROM paths WHERE path = ?", (path,))
+            else:
+                cursor.execute("UPDATE paths SET path = ? WHERE path = ?", (target, path))
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        renamed.append((path, target))
+    conn.commit()
+    return renamed
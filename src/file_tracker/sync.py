@@ -0,0 +1,275 @@
+import json
+import os
+import time
+import uuid
+
+from .storage import canonical_rows
+
+BATCH_SIZE = 1000
+
+
+class HistorySync:
+    """通过共享文件夹在多台设备间合并访问记录（无冲突复制数据类型）
+
+    每台设备对每个路径维护一个只增不减的计数器，总频次为各设备计数之和；
+    最后访问时间取最大值；置顶状态按 (时间戳, 设备) 最后写入者获胜。
+    本机计数器只由本机写入（upsert_paths、merge_paths 记入 sync_local 表的增量）累加，
+    不受同步合并或本机删除的影响。
+    各设备只把自己上次同步后变化的计数器写成增量文件
+    <共享文件夹>/<设备>/<起始序号>-<结束序号>.jsonl，并记录已合并到的各设备序号，
+    因此每次同步只读写增量。记录在本机删除不会同步到其他设备；本机删除的路径只有在
+    其他设备有晚于删除时间的访问时才会重新出现。置顶变化的时间戳取 set_pinned 调用的时刻。
+    """
+
+    def __init__(self, conn, folder):
+        self.conn = conn
+        self.folder = folder
+        self._ensure_tables()
+        self.device = self._state('device_id')
+        if self.device is None:
+            self.device = uuid.uuid4().hex[:12]
+            self._set_state('device_id', self.device)
+            conn.commit()
+
+    def _ensure_tables(self):
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_state (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        ''')
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_counters (
+            path TEXT,
+            device TEXT,
+            count INTEGER,
+            last_access_time TEXT,
+            seq INTEGER,
+            PRIMARY KEY (path, device)
+        )
+        ''')
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_sync_counters_seq ON sync_counters (device, seq)")
+        if self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sync_local'").fetchone() is None:
+            self.conn.execute('''
+            CREATE TABLE sync_local (
+                path TEXT PRIMARY KEY,
+                count INTEGER,
+                last_access_time TEXT
+            )
+            ''')
+            # 开启同步之前的记录尚未计入任何计数器，作为本机的初始增量
+            self.conn.execute('''
+            INSERT INTO sync_local (path, count, last_access_time)
+            SELECT path, access_count - ifnull((SELECT SUM(c.count) FROM sync_counters c WHERE c.path = p.path), 0),
+                   last_access_time
+            FROM paths p
+            ''')
+            self.conn.commit()
+        # set_pinned 写入置顶变化发生的时刻，同步时作为最后写入者的时间戳
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_pin_stamps (
+            path TEXT PRIMARY KEY,
+            stamp REAL
+        )
+        ''')
+        # 本机删除记录的墓碑：任何途径的删除都由触发器记下，重新插入时清除
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_deleted (
+            path TEXT PRIMARY KEY,
+            deleted_at TEXT
+        )
+        ''')
+        self.conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS sync_paths_deleted AFTER DELETE ON paths BEGIN
+            INSERT OR REPLACE INTO sync_deleted (path, deleted_at) VALUES (old.path, datetime('now', 'localtime'));
+        END
+        ''')
+        self.conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS sync_paths_inserted AFTER INSERT ON paths BEGIN
+            DELETE FROM sync_deleted WHERE path = new.path;
+        END
+        ''')
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_pins (
+            path TEXT PRIMARY KEY,
+            is_pinned INTEGER,
+            stamp REAL,
+            device TEXT,
+            seq INTEGER
+        )
+        ''')
+        # 已合并到的各设备序号；本机的值即本机最新的序号
+        self.conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_vector (
+            device TEXT PRIMARY KEY,
+            seq INTEGER
+        )
+        ''')
+
+    def _state(self, key):
+        row = self.conn.execute("SELECT value FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def vector(self):
+        return dict(self.conn.execute("SELECT device, seq FROM sync_vector"))
+
+    def _set_vector(self, device, seq):
+        self.conn.execute("INSERT OR REPLACE INTO sync_vector (device, seq) VALUES (?, ?)", (device, seq))
+
+    def sync(self, now=None):
+        """收集本机变化、写出增量并合并其他设备的增量，返回 (写出的条目数, 合并的条目数)"""
+        try:
+            exported = self.export_changes(now)
+            merged = self.merge_remote()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        return exported, merged
+
+    def collect_local_changes(self, now=None):
+        """把本机写入的访问增量与置顶变化计入本机的计数器，返回本机最新序号"""
+        now = now or time.time()
+        seq = self.vector().get(self.device, 0)
+        counters = []
+        rows = self.conn.execute('''
+        SELECT l.path, l.count, l.last_access_time, o.count, o.last_access_time
+        FROM sync_local l LEFT JOIN sync_counters o ON o.path = l.path AND o.device = ?
+        ''', (self.device,)).fetchall()
+        for path, delta, last_access_time, own, own_last in rows:
+            own_last = own_last or ''
+            last_access_time = max(own_last, last_access_time or '')
+            # 只有时间前进的访问也要写出，其他设备才能得到最新的访问时间
+            if delta > 0 or last_access_time > own_last:
+                seq += 1
+                counters.append((path, self.device, (own or 0) + max(delta, 0), last_access_time, seq))
+        self.conn.execute("DELETE FROM sync_local")
+        pins = []
+        rows = self.conn.execute('''
+        SELECT p.path, p.is_pinned, s.is_pinned, t.stamp
+        FROM paths p LEFT JOIN sync_pins s ON s.path = p.path LEFT JOIN sync_pin_stamps t ON t.path = p.path
+        ''').fetchall()
+        for path, is_pinned, registered, stamp in rows:
+            if (registered or 0) != is_pinned:
+                seq += 1
+                # 没有经过 set_pinned 的变化（如导入合并）只能以本次同步的时刻为准
+                pins.append((path, is_pinned, stamp or now, self.device, seq))
+        self.conn.execute("DELETE FROM sync_pin_stamps")
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO sync_counters (path, device, count, last_access_time, seq) VALUES (?, ?, ?, ?, ?)",
+            counters)
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO sync_pins (path, is_pinned, stamp, device, seq) VALUES (?, ?, ?, ?, ?)", pins)
+        self._set_vector(self.device, seq)
+        return seq
+
+    def export_changes(self, now=None):
+        """写出本机上次导出之后的增量文件，返回写出的条目数"""
+        seq = self.collect_local_changes(now)
+        exported = int(self._state('exported_seq') or 0)
+        count = 0
+        if seq > exported:
+            directory = os.path.join(self.folder, self.device)
+            os.makedirs(directory, exist_ok=True)
+            file_path = os.path.join(directory, f"{exported + 1:010d}-{seq:010d}.jsonl")
+            # 先写临时文件再改名，其他设备不会读到写了一半的增量
+            with open(file_path + '.tmp', 'w', encoding='utf-8') as f:
+                for row in self.conn.execute(
+                        "SELECT path, count, last_access_time, seq FROM sync_counters WHERE device = ? AND seq > ?",
+                        (self.device, exported)):
+                    f.write(json.dumps(['c', *row], ensure_ascii=False) + '\n')
+                    count += 1
+                for row in self.conn.execute(
+                        "SELECT path, is_pinned, stamp, seq FROM sync_pins WHERE device = ? AND seq > ?",
+                        (self.device, exported)):
+                    f.write(json.dumps(['p', *row], ensure_ascii=False) + '\n')
+                    count += 1
+            os.replace(file_path + '.tmp', file_path)
+            self._set_state('exported_seq', seq)
+        self.conn.commit()
+        return count
+
+    def merge_remote(self):
+        """合并其他设备尚未合并的增量文件，并更新受影响路径的 paths 记录，返回合并的条目数"""
+        if not os.path.isdir(self.folder):
+            return 0
+        vector = self.vector()
+        counter_paths = set()
+        pin_paths = set()
+        merged = 0
+        for device in sorted(os.listdir(self.folder)):
+            directory = os.path.join(self.folder, device)
+            if device == self.device or not os.path.isdir(directory):
+                continue
+            known = vector.get(device, 0)
+            for name in sorted(os.listdir(directory)):
+                try:
+                    first, last = (int(part) for part in name[:-len('.jsonl')].split('-'))
+                except ValueError:
+                    continue  # 临时文件或其他文件
+                if last <= known:
+                    continue
+                if first > known + 1:
+                    break  # 中间的增量尚未同步到本地，等待下次
+                merged += self._merge_file(os.path.join(directory, name), device, counter_paths, pin_paths)
+                known = last
+            self._set_vector(device, known)
+        self._materialize(counter_paths, pin_paths)
+        self.conn.commit()
+        return merged
+
+    def _merge_file(self, file_path, device, counter_paths, pin_paths):
+        counters = []
+        pins = []
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                kind, path, value, extra, seq = json.loads(line)
+                if kind == 'c':
+                    counters.append((path, device, value, extra, seq))
+                else:
+                    pins.append((path, value, extra, device, seq))
+        # 其他设备（可能是旧版本）写出的路径同样规范化，并沿用本机已有的写法
+        counters = list(canonical_rows(self.conn, counters))
+        pins = list(canonical_rows(self.conn, pins))
+        counter_paths.update(row[0] for row in counters)
+        pin_paths.update(row[0] for row in pins)
+        # 计数器合并取最大值，重复或乱序应用同一增量结果不变
+        for start in range(0, len(counters), BATCH_SIZE):
+            self.conn.executemany('''
+            INSERT INTO sync_counters (path, device, count, last_access_time, seq) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(path, device) DO UPDATE SET
+            count = max(count, excluded.count),
+            last_access_time = max(ifnull(last_access_time, ''), excluded.last_access_time),
+            seq = max(seq, excluded.seq)
+            ''', counters[start:start + BATCH_SIZE])
+        self.conn.executemany('''
+        INSERT INTO sync_pins (path, is_pinned, stamp, device, seq) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(path) DO UPDATE SET
+        is_pinned = excluded.is_pinned, stamp = excluded.stamp, device = excluded.device, seq = excluded.seq
+        WHERE (excluded.stamp, excluded.device) > (stamp, device)
+        ''', pins)
+        return len(counters) + len(pins)
+
+    def _materialize(self, counter_paths, pin_paths):
+        # 只重算受增量影响的路径：先写入临时表，再用一条语句整体汇总；
+        # 本机已删除的路径只在有晚于删除时间的访问时才重新插入
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS sync_touched (path TEXT PRIMARY KEY)")
+        self.conn.execute("DELETE FROM sync_touched")
+        self.conn.executemany("INSERT INTO sync_touched (path) VALUES (?)", ((path,) for path in counter_paths))
+        self.conn.execute('''
+        INSERT INTO paths (path, access_count, last_access_time, is_pinned)
+        SELECT c.path, SUM(c.count), MAX(c.last_access_time), ifnull(s.is_pinned, 0)
+        FROM sync_touched t JOIN sync_counters c ON c.path = t.path LEFT JOIN sync_pins s ON s.path = t.path
+        LEFT JOIN sync_deleted d ON d.path = t.path
+        GROUP BY c.path
+        HAVING d.deleted_at IS NULL OR MAX(c.last_access_time) > d.deleted_at
+        ON CONFLICT(path) DO UPDATE SET
+        access_count = excluded.access_count,
+        last_access_time = max(ifnull(last_access_time, ''), excluded.last_access_time)
+        ''')
+        self.conn.executemany(
+            "UPDATE paths SET is_pinned = (SELECT is_pinned FROM sync_pins WHERE path = ?) WHERE path = ?",
+            ((path, path) for path in pin_paths))
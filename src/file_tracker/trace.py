@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from . import storage
+
+
+def _timestamp(text):
+    return time.mktime(time.strptime(text, storage.TIME_FORMAT)) if text else 0
+
+
+def table_digest(conn):
+    """paths 表内容的摘要，不含自增 id，用于比较回放前后的数据库状态"""
+    digest = hashlib.sha256()
+    for row in conn.execute("SELECT path, access_count, last_access_time, is_pinned FROM paths ORDER BY path"):
+        digest.update(json.dumps(row, ensure_ascii=False).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class TraceRecorder:
+    """把界面上的用户操作追加写入轨迹文件（需主动开启）
+
+    每次录制为一段：首行为头部 {"version", "start", "initial_digest"}，之后每个操作
+    为 [距开始的秒数, 操作名, 参数...]，关闭时写入 {"final_digest"}。多次启动的录制依次追加，
+    文件超过 max_bytes 时先改名为 <文件>.1 再重新开始。
+    记录访问时连同写入数据库的时间字符串一起保存，回放结果因此与时钟无关；
+    导入、同步等批量写入无法逐条记录，之后用 checkpoint 记下当时的摘要。
+    """
+
+    def __init__(self, file_path, conn, max_bytes=50 * 1024 * 1024):
+        self.start = time.time()
+        self._lock = threading.Lock()
+        try:
+            if os.path.getsize(file_path) > max_bytes:
+                os.replace(file_path, file_path + '.1')
+        except OSError:
+            pass
+        self._file = open(file_path, 'a', encoding='utf-8')
+        self._write({'version': 1, 'start': self.start, 'initial_digest': table_digest(conn)})
+
+    def _write(self, obj):
+        self._file.write(json.dumps(obj, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def log(self, op, *args):
+        with self._lock:
+            if self._file is not None:
+                self._write([round(time.time() - self.start, 3), op, *args])
+
+    def checkpoint(self, op, conn, *args):
+        """记录一次无法回放的批量写入，以及写入后的摘要"""
+        self.log(op, *args, table_digest(conn))
+
+    def close(self, conn):
+        with self._lock:
+            if self._file is not None:
+                self._write({'final_digest': table_digest(conn)})
+                self._file.close()
+                self._file = None
+
+
+def read_sessions(file_path):
+    """返回各段录制的 [(头部, 操作列表, 结尾)]，按录制先后排列"""
+    sessions = []
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if isinstance(item, list):
+                if not sessions:
+                    sessions.append(({}, [], {}))
+                sessions[-1][1].append(item)
+            elif 'final_digest' in item and sessions:
+                sessions[-1][2].update(item)
+            else:
+                sessions.append((item, [], {}))
+    return sessions
+
+
+def read_trace(file_path):
+    """把全部录制合并为一段，返回 (头部, 操作列表, 结尾)
+
+    后一段的时间接在前一段最后一个操作之后；第二段起的开头插入 ['session', 初始摘要] 操作，
+    回放时据此检查两次录制之间数据库是否被改动过。
+    """
+    sessions = read_sessions(file_path)
+    if not sessions:
+        return {}, [], {}
+    events = []
+    offset = 0
+    for index, (header, session_events, _) in enumerate(sessions):
+        if index and 'initial_digest' in header:
+            events.append([offset, 'session', header['initial_digest']])
+        for event in session_events:
+            events.append([offset + event[0]] + event[1:])
+        if events:
+            offset = events[-1][0]
+    return sessions[0][0], events, sessions[-1][2]
+
+
+class Replayer:
+    """在无界面的情况下，把轨迹中的操作依次作用于存储层与排序模型"""
+
+    def __init__(self, conn):
+        from .launcher import FolderLauncher, StubBackend
+        from .sorted_model import SortedPathModel
+
+        self.conn = conn
+        self.launcher = FolderLauncher(StubBackend())
+        self.model = SortedPathModel()
+        self._reload_model()
+        self.latencies = {}
+        self.checkpoints = []   # [(操作名, 回放到此处时摘要是否一致)]
+
+    def _reload_model(self):
+        self.model.load((path, count, _timestamp(last)) for path, count, last, _ in storage.iter_paths(self.conn))
+
+    def apply(self, op, *args):
+        if op == 'record':
+            path, now = args
+            storage.record_path(self.conn, path, now)
+            count = self.model.records.get(path, (0, 0))[0] + 1
+            self.model.update(path, count, _timestamp(now))
+        elif op == 'open':
+            self.launcher.open(args[0])
+        elif op in ('pin', 'unpin'):
+            storage.set_pinned(self.conn, args[0], op == 'pin')
+        elif op in ('delete', 'evict'):
+            paths = args if op == 'delete' else args[0]
+            storage.delete_paths(self.conn, paths)
+            for path in paths:
+                self.model.remove(path)
+        elif op == 'clear':
+            self.conn.execute("DELETE FROM paths")
+            self.conn.commit()
+            self.model.load([])
+        elif op == 'rename':
+            if storage.rename_path_prefix(self.conn, *args):
+                self._reload_model()  # 改名可能合并已有记录，直接重建
+        elif op == 'sort':
+            self.model.set_order('last_access_time' if args[0] == 2 else 'access_count')
+        elif op == 'import':
+            # 导入的文件仍在时重新导入，否则只能在检查点报告不一致
+            from .history_io import import_history
+            if os.path.isfile(args[0]):
+                import_history(self.conn, args[0])
+                self._reload_model()
+            self._check(op, args[-1])
+        elif op in ('sync', 'session'):
+            # 其他设备的增量与两次录制之间的改动无法重现，只检查摘要
+            self._check(op, args[-1])
+        # 'resize' 只影响界面布局，回放时仅计入次数
+
+    def _check(self, op, digest):
+        self.checkpoints.append((op, table_digest(self.conn) == digest))
+
+    def run(self, events, speed=None):
+        """按记录的节奏（speed 为倍速）或尽快（speed=None）执行全部操作"""
+        started = time.perf_counter()
+        for offset, op, *args in events:
+            if speed:
+                delay = offset / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            begin = time.perf_counter()
+            self.apply(op, *args)
+            self.latencies.setdefault(op, []).append(time.perf_counter() - begin)
+        self.launcher.shutdown()
+
+    def report(self):
+        """每种操作的 (次数, 平均, p95, 最大) 耗时，单位秒"""
+        result = {}
+        for op, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+            result[op] = (len(values), sum(values) / len(values), p95, values[-1])
+        return result
+
+
+def replay(trace_path, conn, speed=None):
+    """回放轨迹，返回 (Replayer, 初始状态是否一致, 最终状态是否一致)
+
+    没有记录摘要时对应的结果为 None。
+    """
+    header, events, footer = read_trace(trace_path)
+    initial_ok = None
+    if 'initial_digest' in header:
+        initial_ok = table_digest(conn) == header['initial_digest']
+    replayer = Replayer(conn)
+    replayer.run(events, speed)
+    final_ok = None
+    if 'final_digest' in footer:
+        final_ok = table_digest(conn) == footer['final_digest']
+    return replayer, initial_ok, final_ok
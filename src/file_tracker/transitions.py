@@ -0,0 +1,101 @@
+import sqlite3
+
+
+class TransitionModel:
+    """一阶转移模型：统计“访问 A 之后紧接着访问 B”的次数，用于预测下一个文件夹
+
+    采用前向衰减：每次访问的增量按 1/decay 递增，相当于把所有旧计数乘以 decay，
+    但每次更新只需 O(1)。权重只增不减，因此每个来源保存的前 k 个候选可以在
+    更新时增量维护，查询建议时无需任何计算。
+    """
+
+    RENORMALIZE_AT = 1e100
+
+    def __init__(self, decay=0.98, top_k=5):
+        self.decay = decay
+        self.top_k = top_k
+        self.weights = {}     # 来源 -> {目标: 权重}
+        self.top = {}         # 来源 -> [(权重, 目标)]，按权重降序，至多 top_k 项
+        self.increment = 1.0
+        self.current = None
+
+    def observe(self, path):
+        """记录一次访问；与上一次访问不同时累加一次转移"""
+        previous, self.current = self.current, path
+        if previous is not None and previous != path:
+            self.add(previous, path, self.increment)
+            self.increment /= self.decay
+            if self.increment > self.RENORMALIZE_AT:
+                self._renormalize()
+
+    def add(self, source, target, amount):
+        targets = self.weights.setdefault(source, {})
+        weight = targets.get(target, 0.0) + amount
+        targets[target] = weight
+        top = [entry for entry in self.top.get(source, []) if entry[1] != target]
+        if len(top) < self.top_k or weight > top[-1][0]:
+            top.append((weight, target))
+            top.sort(reverse=True)
+            del top[self.top_k:]
+        self.top[source] = top
+
+    def suggest(self, path=None):
+        """返回当前（或指定）文件夹之后最可能访问的文件夹，按可能性降序"""
+        return [target for _, target in self.top.get(self.current if path is None else path, [])]
+
+    def forget(self, path):
+        """路径被删除时移除所有相关的转移"""
+        self.weights.pop(path, None)
+        self.top.pop(path, None)
+        for source, targets in self.weights.items():
+            if targets.pop(path, None) is not None:
+                self.top[source] = [entry for entry in self.top[source] if entry[1] != path]
+                # 被移除的名额由剩余目标中最重的补上
+                for target, weight in sorted(targets.items(), key=lambda item: item[1], reverse=True):
+                    if len(self.top[source]) >= self.top_k:
+                        break
+                    if all(entry[1] != target for entry in self.top[source]):
+                        self.top[source].append((weight, target))
+                self.top[source].sort(reverse=True)
+        if self.current == path:
+            self.current = None
+
+    def _renormalize(self):
+        # 极少发生：把所有权重和增量一起缩小，比例不变
+        scale = self.increment
+        self.increment = 1.0
+        for targets in self.weights.values():
+            for target in targets:
+                targets[target] /= scale
+        self.top = {source: [(weight / scale, target) for weight, target in top] for source, top in self.top.items()}
+
+    def load(self, conn):
+        """从数据库载入已衰减到当前时刻的权重"""
+        self._ensure_table(conn)
+        for source, target, weight in conn.execute("SELECT source, target, weight FROM transitions"):
+            self.add(source, target, weight * self.increment)
+
+    def save(self, conn):
+        """把权重换算到当前时刻后写回数据库"""
+        self._ensure_table(conn)
+        try:
+            conn.execute("DELETE FROM transitions")
+            conn.executemany(
+                "INSERT INTO transitions (source, target, weight) VALUES (?, ?, ?)",
+                ((source, target, weight / self.increment)
+                 for source, targets in self.weights.items() for target, weight in targets.items()))
+            conn.commit()
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+
+    @staticmethod
+    def _ensure_table(conn):
+        conn.execute('''
+        CREATE TABLE IF NOT EXISTS transitions (
+            source TEXT,
+            target TEXT,
+            weight REAL,
+            PRIMARY KEY (source, target)
+        )
+        ''')
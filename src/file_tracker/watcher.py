@@ -0,0 +1,282 @@
+import os
+import sys
+import time
+import ctypes
+import ctypes.util
+import select
+import struct
+import threading
+
+from .path_trie import PathTrie
+
+# 事件类型
+MOVED_FROM = 'moved_from'
+MOVED_TO = 'moved_to'
+DELETED = 'deleted'
+CREATED = 'created'
+WATCH_GONE = 'watch_gone'
+
+
+class WatchBackend:
+    """文件系统变更通知后端的接口，各平台实现此类即可接入 PathWatcher"""
+
+    def add_watch(self, directory):
+        """监视目录中条目的改名、删除与创建，返回监视句柄"""
+        raise NotImplementedError
+
+    def remove_watch(self, handle):
+        raise NotImplementedError
+
+    def read_events(self, timeout):
+        """最多等待 timeout 秒，返回 [(事件类型, 路径, cookie)]"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class InotifyBackend(WatchBackend):
+    """基于 Linux inotify 的后端"""
+
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    _EVENT = struct.Struct('iIII')
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes = (ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32)
+        self._rm = libc.inotify_rm_watch
+        self._rm.argtypes = (ctypes.c_int, ctypes.c_int)
+        self.fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._dirs = {}
+
+    def add_watch(self, directory):
+        mask = self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_CREATE | self.IN_DELETE | self.IN_ONLYDIR
+        wd = self._add(self.fd, os.fsencode(directory), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"无法监视目录: {directory}")
+        self._dirs[wd] = directory
+        return wd
+
+    def remove_watch(self, handle):
+        if self._dirs.pop(handle, None) is not None:
+            self._rm(self.fd, handle)
+
+    def read_events(self, timeout):
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & self.IN_IGNORED:
+                del self._dirs[wd]
+                events.append((WATCH_GONE, directory, 0))
+            elif mask & self.IN_MOVED_FROM:
+                events.append((MOVED_FROM, os.path.join(directory, name), cookie))
+            elif mask & self.IN_MOVED_TO:
+                events.append((MOVED_TO, os.path.join(directory, name), cookie))
+            elif mask & self.IN_DELETE:
+                events.append((DELETED, os.path.join(directory, name), 0))
+            elif mask & self.IN_CREATE:
+                events.append((CREATED, os.path.join(directory, name), 0))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def default_backend():
+    """返回当前平台可用的后端，没有时返回 None（监视功能关闭）"""
+    if sys.platform.startswith('linux'):
+        try:
+            return InotifyBackend()
+        except (OSError, AttributeError):
+            return None
+    return None
+
+
+class PathWatcher:
+    """监视被记录路径的上级目录，批量、去抖后回调路径的改名、删除和恢复
+
+    on_changes(renames, deleted, restored) 在后台线程中调用，
+    renames 为 [(旧路径, 新路径)]，deleted、restored 为路径列表。
+    监视的目录数不超过 max_watches，优先保留访问次数多的路径所在目录。
+    目录持续变化时，距第一个未处理事件 max_delay 秒或积压 max_pending 个事件后也会处理一次。
+    """
+
+    def __init__(self, on_changes, backend=None, max_watches=512, debounce=0.3, max_delay=5.0, max_pending=10000):
+        self.on_changes = on_changes
+        self.backend = backend if backend is not None else default_backend()
+        self.max_watches = max_watches
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self.tracked = PathTrie()
+        self._watches = {}      # 目录 -> (句柄, 优先级)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.backend is not None
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='PathWatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.enabled:
+            self.backend.close()
+
+    def sync(self, rows):
+        """按 (path, access_count) 行重建要监视的目录集合"""
+        if not self.enabled:
+            return
+        priorities = {}
+        tracked = PathTrie()
+        for path, access_count in rows:
+            tracked.add(path, access_count)
+            parent = os.path.dirname(path.rstrip('\\/'))
+            if parent and access_count > priorities.get(parent, 0):
+                priorities[parent] = access_count
+        wanted = dict(sorted(priorities.items(), key=lambda item: item[1], reverse=True)[:self.max_watches])
+        with self._lock:
+            self.tracked = tracked
+            for directory in list(self._watches):
+                if directory not in wanted:
+                    self._unwatch(directory)
+            for directory, priority in wanted.items():
+                if directory in self._watches:
+                    self._watches[directory] = (self._watches[directory][0], priority)
+                else:
+                    self._watch(directory, priority)
+
+    def track(self, path, access_count=1):
+        """增量加入一个路径；监视数已满时替换优先级最低的目录"""
+        if not self.enabled:
+            return
+        parent = os.path.dirname(path.rstrip('\\/'))
+        with self._lock:
+            self.tracked.add(path, 1)
+            if not parent:
+                return
+            if parent in self._watches:
+                handle, priority = self._watches[parent]
+                self._watches[parent] = (handle, max(priority, access_count))
+                return
+            if len(self._watches) >= self.max_watches:
+                coldest = min(self._watches, key=lambda directory: self._watches[directory][1])
+                if self._watches[coldest][1] >= access_count:
+                    return
+                self._unwatch(coldest)
+            self._watch(parent, access_count)
+
+    def untrack(self, path):
+        with self._lock:
+            self.tracked.remove(path)
+
+    def watched_directories(self):
+        with self._lock:
+            return list(self._watches)
+
+    def _watch(self, directory, priority):
+        try:
+            self._watches[directory] = (self.backend.add_watch(directory), priority)
+        except OSError:
+            pass  # 目录不存在或无权限，等用户点击时再处理
+
+    def _unwatch(self, directory):
+        handle, _ = self._watches.pop(directory)
+        self.backend.remove_watch(handle)
+
+    def _run(self):
+        pending = []
+        deadline = None
+        latest = None   # 第一个未处理事件到达后最晚的处理时间
+        while not self._stop.is_set():
+            timeout = 0.5 if deadline is None else max(0.0, deadline - time.monotonic())
+            events = self.backend.read_events(timeout)
+            now = time.monotonic()
+            if events:
+                pending.extend(events)
+                if latest is None:
+                    latest = now + self.max_delay
+                # 去抖：静默一段时间后再统一处理，但不晚于 latest
+                deadline = min(now + self.debounce, latest)
+            if deadline is not None and (now >= deadline or len(pending) >= self.max_pending):
+                self._flush(pending)
+                pending = []
+                deadline = latest = None
+
+    def _flush(self, events):
+        renames, deleted, restored = self.coalesce(events)
+        with self._lock:
+            for kind, directory, _ in events:
+                if kind == WATCH_GONE:
+                    self._watches.pop(directory, None)  # 后端已自动移除该监视
+            renames = [(old, new) for old, new in renames if self.tracked.node(old) is not None]
+            deleted = [path for path in deleted if self.tracked.node(path) is not None]
+            restored = [path for path in restored if self.tracked.node(path) is not None]
+            for old, new in renames:
+                self.tracked.move(old, new)
+                # 被改名的目录本身也在监视中时，按新路径重新登记
+                for directory in [d for d in self._watches if d == old or d.startswith(old + os.sep)]:
+                    _, priority = self._watches[directory]
+                    self._unwatch(directory)
+                    self._watch(new + directory[len(old):], priority)
+        if renames or deleted or restored:
+            self.on_changes(renames, deleted, restored)
+
+    @staticmethod
+    def coalesce(events):
+        """把一批原始事件合并为 (renames, deleted, restored)"""
+        moved_from = {}
+        renames = []
+        deleted = {}
+        restored = {}
+        for kind, path, cookie in events:
+            if kind == MOVED_FROM:
+                moved_from[cookie] = path
+            elif kind == MOVED_TO and cookie in moved_from:
+                renames.append((moved_from.pop(cookie), path))
+            elif kind in (DELETED, WATCH_GONE):
+                deleted[path] = None
+                restored.pop(path, None)
+            elif kind in (CREATED, MOVED_TO):
+                if path in deleted:
+                    del deleted[path]  # 先删后建（例如编辑器的原子替换）视为没有删除
+                else:
+                    restored[path] = None
+        # 移出监视范围的条目没有配对的 MOVED_TO，只能视为删除
+        for path in moved_from.values():
+            deleted[path] = None
+        return renames, list(deleted), list(restored)
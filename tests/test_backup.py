@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from src.file_tracker.backup import BackupScheduler, check_integrity, create_snapshot, list_snapshots, restore_latest
+from src.file_tracker.storage import connect, merge_paths
+
+
+def make_db(path, rows):
+    conn = connect(str(path))
+    merge_paths(conn, [(f'/p{i}', i, '2024-01-01 00:00:00', 0) for i in range(rows)])
+    conn.close()
+
+
+def test_snapshots_rotate_and_restore_replaces_corrupt_db(tmp_path):
+    db = tmp_path / 'file_tracker.db'
+    backups = str(tmp_path / 'backups')
+    make_db(db, 2000)
+    for _ in range(4):
+        create_snapshot(str(db), backups, keep=3, pages=8, pause=0)
+    assert len(list_snapshots(backups)) == 3
+
+    db.write_bytes(b'not a database' * 100)
+    assert not check_integrity(str(db))
+    assert restore_latest(str(db), backups) == list_snapshots(backups)[0]
+    assert check_integrity(str(db))
+    assert connect(str(db)).execute('SELECT COUNT(*) FROM paths').fetchone()[0] == 2000
+    assert any(name.startswith('file_tracker.db.corrupt-') for name in os.listdir(tmp_path))
+
+
+def test_snapshot_can_be_cancelled(tmp_path):
+    db = tmp_path / 'file_tracker.db'
+    make_db(db, 2000)
+    stop = threading.Event()
+    stop.set()
+    with pytest.raises(InterruptedError):
+        create_snapshot(str(db), str(tmp_path / 'backups'), pages=1, pause=0, stop=stop)
+    assert os.listdir(tmp_path / 'backups') == []
+
+
+def test_locked_database_is_not_restored(tmp_path):
+    # 路径中带有 URI 特殊字符，也必须检查到同一个文件
+    folder = tmp_path / 'a?b#c%d'
+    folder.mkdir()
+    db = folder / 'file_tracker.db'
+    backups = str(tmp_path / 'backups')
+    make_db(db, 100)
+    assert check_integrity(str(db)) is True
+    create_snapshot(str(db), backups, pause=0)
+
+    locker = sqlite3.connect(str(db))
+    locker.execute('BEGIN EXCLUSIVE')
+    assert check_integrity(str(db), timeout=0.05) is None
+    corrupt = []
+    scheduler = BackupScheduler(str(db), backups, interval=3600, on_corrupt=lambda: corrupt.append(1),
+                                retry_interval=0.05, busy_timeout=0.05)
+    scheduler.start()
+    time.sleep(0.3)
+    assert corrupt == []
+    assert len(list_snapshots(backups)) == 1
+    locker.rollback()
+    locker.close()
+    scheduler.stop()
+    assert corrupt == []
+    assert not any('.corrupt-' in name for name in os.listdir(folder))
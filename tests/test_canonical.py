@@ -0,0 +1,124 @@
+import ntpath
+import posixpath
+import sqlite3
+
+from src.file_tracker import storage
+from src.file_tracker.canonical import canonical_path, canonicalize, key_of, merge_duplicates
+
+
+def test_windows_variants_share_one_key():
+    variants = ['C:\\Foo', 'c:\\foo\\', 'C:/Foo', 'c:\\Bar\\..\\FOO', 'C:\\\\foo\\.']
+    assert {key_of(path, ntpath) for path in variants} == {'c:\\foo'}
+    assert canonicalize('c:/Work/Projects/', ntpath) == 'C:\\Work\\Projects'
+    assert canonicalize('c:\\', ntpath) == 'C:\\'
+    assert canonicalize('\\\\server\\share\\dir\\', ntpath) == '\\\\server\\share\\dir'
+
+
+def test_posix_keeps_case_and_drops_trailing_slash():
+    assert canonicalize('/home/User/./docs//', posixpath) == '/home/User/docs'
+    assert key_of('/home/User', posixpath) != key_of('/home/user', posixpath)
+    assert canonicalize('/', posixpath) == '/'
+
+    canonical_path.cache_clear()
+    for _ in range(3):
+        canonical_path('/srv/data/')
+    assert canonical_path.cache_info().hits == 2
+
+
+def test_merge_duplicates_in_one_pass(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'old.db'))
+    conn.execute("CREATE TABLE paths (id INTEGER PRIMARY KEY, path TEXT UNIQUE, access_count INTEGER DEFAULT 1, "
+                 "last_access_time TEXT, is_pinned INTEGER DEFAULT 0)")
+    conn.executemany("INSERT INTO paths (path, access_count, last_access_time, is_pinned) VALUES (?, ?, ?, ?)", [
+        ('C:\\Foo', 3, '2024-01-01 10:00:00', 0),
+        ('c:\\foo\\', 2, '2024-03-01 10:00:00', 1),
+        ('C:/Foo', 1, None, 0),
+        ('D:\\Bar\\', 4, '2024-02-01 10:00:00', 0),
+        ('E:\\Baz', 1, '2024-02-01 10:00:00', 0),
+    ])
+    conn.commit()
+    removed = merge_duplicates(conn, batch_size=1,
+                               key=lambda path: key_of(path, ntpath), canonical=lambda path: canonicalize(path, ntpath))
+    assert removed == 2
+    assert conn.execute("SELECT id, path, access_count, last_access_time, is_pinned FROM paths ORDER BY id").fetchall() == [
+        (1, 'C:\\foo', 6, '2024-03-01 10:00:00', 1),
+        (4, 'D:\\Bar', 4, '2024-02-01 10:00:00', 0),
+        (5, 'E:\\Baz', 1, '2024-02-01 10:00:00', 0),
+    ]
+    conn.close()
+
+
+def test_connect_migrates_once_and_upserts_are_canonical(tmp_path):
+    db = str(tmp_path / 'ft.db')
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE paths (id INTEGER PRIMARY KEY, path TEXT UNIQUE, access_count INTEGER DEFAULT 1, "
+                 "last_access_time TEXT, is_pinned INTEGER DEFAULT 0)")
+    conn.executemany("INSERT INTO paths (path, access_count, last_access_time) VALUES (?, ?, ?)",
+                     [('/data/', 2, '2024-01-01 00:00:00'), ('/data', 1, '2024-01-02 00:00:00')])
+    conn.commit()
+    conn.close()
+
+    conn = storage.connect(db)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 2
+    storage.record_path(conn, '/data//', '2024-01-03 00:00:00')
+    assert conn.execute("SELECT path, access_count, last_access_time FROM paths").fetchall() == [
+        ('/data', 4, '2024-01-03 00:00:00')]
+    conn.close()
+
+
+def test_case_variants_resolve_to_existing_spelling(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, 'CASE_INSENSITIVE', True)
+    conn = storage.connect(str(tmp_path / 'ft.db'))
+    storage.record_path(conn, '/Work/Projects', '2024-01-01 00:00:00')
+    storage.upsert_paths(conn, [('/work/projects', 2, '2024-01-02 00:00:00'),
+                                ('/new/Dir', 1, '2024-01-02 00:00:00'), ('/NEW/dir', 1, '2024-01-03 00:00:00')])
+    storage.merge_paths(conn, [('/WORK/PROJECTS', 1, '2024-01-04 00:00:00', 1)])
+    assert conn.execute("SELECT path, access_count, last_access_time, is_pinned FROM paths ORDER BY id").fetchall() == [
+        ('/Work/Projects', 4, '2024-01-04 00:00:00', 1),
+        ('/new/Dir', 2, '2024-01-03 00:00:00', 0),
+    ]
+
+
+def test_merge_duplicates_rekeys_sync_and_transition_tables(tmp_path):
+    from src.file_tracker.sync import HistorySync
+    from src.file_tracker.transitions import TransitionModel
+
+    conn = storage.connect(str(tmp_path / 'ft.db'))
+    HistorySync(conn, str(tmp_path / 'shared'))
+    model = TransitionModel()
+    model.add('C:\\Foo', 'C:\\Bar', 1.0)
+    model.add('c:\\foo\\', 'C:\\Bar', 2.0)
+    model.add('C:\\Foo', 'c:\\foo', 5.0)
+    model.save(conn)
+    conn.executemany("INSERT INTO paths (path, access_count, last_access_time) VALUES (?, ?, ?)",
+                     [('C:\\Foo', 1, '2024-01-01 00:00:00'), ('c:\\foo\\', 2, '2024-01-02 00:00:00')])
+    conn.executemany("INSERT INTO sync_counters (path, device, count, last_access_time, seq) VALUES (?, ?, ?, ?, ?)", [
+        ('C:\\Foo', 'a', 1, '2024-01-01 00:00:00', 1), ('c:\\foo\\', 'a', 2, '2024-01-02 00:00:00', 2),
+        ('C:\\Foo', 'b', 3, '2024-01-01 00:00:00', 7)])
+    conn.executemany("INSERT INTO sync_pins (path, is_pinned, stamp, device, seq) VALUES (?, ?, ?, ?, ?)",
+                     [('C:\\Foo', 1, 10.0, 'a', 3), ('c:\\foo\\', 0, 20.0, 'b', 8)])
+    conn.executemany("INSERT INTO sync_local (path, count, last_access_time) VALUES (?, ?, ?)",
+                     [('C:\\Foo', 1, '2024-01-03 00:00:00'), ('c:\\foo\\', 1, '2024-01-02 00:00:00')])
+    conn.commit()
+
+    assert merge_duplicates(conn, key=lambda path: key_of(path, ntpath),
+                            canonical=lambda path: canonicalize(path, ntpath)) == 1
+    assert conn.execute("SELECT source, target, weight FROM transitions").fetchall() == [('C:\\foo', 'C:\\Bar', 3.0)]
+    assert sorted(conn.execute("SELECT path, device, count, last_access_time, seq FROM sync_counters")) == [
+        ('C:\\foo', 'a', 3, '2024-01-02 00:00:00', 2), ('C:\\foo', 'b', 3, '2024-01-01 00:00:00', 7)]
+    assert conn.execute("SELECT path, is_pinned, device FROM sync_pins").fetchall() == [('C:\\foo', 0, 'b')]
+    assert conn.execute("SELECT path, count, last_access_time FROM sync_local").fetchall() == [
+        ('C:\\foo', 2, '2024-01-03 00:00:00')]
+
+
+def test_targets_below_volume_roots_match():
+    from src.file_tracker.canonical import is_below
+
+    # 逐级展开 /home/user/docs：根目录 / 的键本身以分隔符结尾，不能再拼出 //
+    target = key_of('/home/user/docs', posixpath)
+    chain = [key_of(path, posixpath) for path in ('/', '/home', '/home/user')]
+    assert all(is_below(target, key, '/') for key in chain)
+    assert not is_below(target, key_of('/home/user/docs', posixpath), '/')
+    assert not is_below(key_of('/homework', posixpath), key_of('/home', posixpath), '/')
+    assert is_below(key_of('C:\\Work\\a', ntpath), key_of('c:\\', ntpath), '\\')
+    assert is_below(key_of('C:\\Work\\a', ntpath), key_of('C:\\work\\', ntpath), '\\')
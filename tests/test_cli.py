@@ -0,0 +1,55 @@
+import os
+import subprocess
+import sys
+import time
+
+from src.file_tracker.cli import main
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_cli(*args):
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True)
+
+
+def best_of(runs, *args):
+    best = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        run_cli(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def test_commands(tmp_path, capsys):
+    db = str(tmp_path / 'ft.db')
+    folder = str(tmp_path)
+    assert main(['--db', db, 'record', folder, folder, ROOT]) == 0
+    assert main(['--db', db, 'pin', ROOT]) == 0
+    assert main(['--db', db, 'pin', '/no/such/path']) == 1
+    capsys.readouterr()
+
+    assert main(['--db', db, 'top', '-n', '2']) == 0
+    assert capsys.readouterr().out.splitlines() == [ROOT, folder]
+
+    assert main(['--db', db, 'record', str(tmp_path / 'gone')]) == 0
+    assert main(['--db', db, 'sweep']) == 0
+    assert capsys.readouterr().out.splitlines() == [str(tmp_path / 'gone')]
+    assert main(['--db', db, 'search', 'gone']) == 1
+
+
+def test_cli_never_imports_gui_toolkits(tmp_path):
+    result = run_cli('-X', 'importtime', '-m', 'src.file_tracker', '--db', str(tmp_path / 'ft.db'), 'top')
+    assert result.returncode == 0
+    imported = {line.split('|')[-1].strip() for line in result.stderr.splitlines()}
+    assert not {name for name in imported if name.split('.')[0] in ('wx', 'PyQt5', 'ctypes')}
+
+
+def test_cli_cold_start_time(tmp_path):
+    # 扣除解释器本身的启动时间，命令行自身的开销应低于 50 毫秒
+    db = str(tmp_path / 'ft.db')
+    run_cli('-m', 'src.file_tracker', '--db', db, 'top')
+    baseline = best_of(5, '-c', 'pass')
+    elapsed = best_of(5, '-m', 'src.file_tracker', '--db', db, 'top')
+    assert elapsed - baseline < 0.05, f"启动耗时 {elapsed - baseline:.3f}s"
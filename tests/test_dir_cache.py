@@ -0,0 +1,46 @@
+import os
+import threading
+
+from src.file_tracker.dir_cache import DirectoryLister
+
+
+def test_listing_is_cached_until_directory_changes(tmp_path):
+    (tmp_path / 'b.txt').write_text('x')
+    (tmp_path / 'A').mkdir()
+    (tmp_path / '.hidden').mkdir()
+    lister = DirectoryLister(max_workers=1, max_dirs=1)
+    try:
+        entries = lister.list_dir(str(tmp_path))
+        assert [(e.name, e.is_dir, e.is_hidden) for e in entries] == [
+            ('.hidden', True, True), ('A', True, False), ('b.txt', False, False)]
+        assert lister.list_dir(str(tmp_path)) is entries
+
+        (tmp_path / 'c.txt').write_text('y')
+        os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 10 ** 9))
+        assert lister.cached(str(tmp_path)) is None
+        # peek 不访问磁盘，仍返回旧列表，由后台的 list_dir 确认
+        assert lister.peek(str(tmp_path)) is entries
+        assert [e.name for e in lister.list_dir(str(tmp_path))][-1] == 'c.txt'
+
+        # 容量为 1 时，列出其他目录会淘汰旧条目
+        lister.list_dir(str(tmp_path / 'A'))
+        assert lister.cached(str(tmp_path)) is None
+    finally:
+        lister.shutdown()
+
+
+def test_submit_and_prefetch_run_in_background(tmp_path):
+    (tmp_path / 'proj' / 'src').mkdir(parents=True)
+    lister = DirectoryLister(max_workers=2)
+    results = []
+    done = threading.Event()
+    try:
+        lister.submit(str(tmp_path / 'missing'), lambda path, entries, error: (results.append(error), done.set()))
+        assert done.wait(5) and isinstance(results[0], OSError)
+
+        lister.prefetch([str(tmp_path / 'proj' / 'src')])
+        lister._executor.shutdown(wait=True)
+        assert lister.cached(str(tmp_path / 'proj')) is not None
+        assert lister.cached(str(tmp_path)) is not None
+    finally:
+        lister.shutdown()
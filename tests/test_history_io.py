@@ -0,0 +1,70 @@
+import sqlite3
+
+import pytest
+
+from src.file_tracker.history_io import export_history, import_history
+
+
+def make_db(rows):
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE paths (id INTEGER PRIMARY KEY, path TEXT UNIQUE, access_count INTEGER DEFAULT 1, '
+                 'last_access_time TEXT, is_pinned INTEGER DEFAULT 0)')
+    conn.executemany('INSERT INTO paths (path, access_count, last_access_time, is_pinned) VALUES (?, ?, ?, ?)', rows)
+    return conn
+
+
+@pytest.mark.parametrize('name', ['history.jsonl', 'history.csv'])
+def test_export_then_import_merges(tmp_path, name):
+    source = make_db([
+        ('C:\\工作\\a', 3, '2024-01-02 10:00:00', 1),
+        ('C:\\b,"quoted"', 2, '2024-01-01 10:00:00', 0),
+    ])
+    target = make_db([
+        ('C:\\工作\\a', 1, '2024-01-05 10:00:00', 0),
+        ('C:\\c', 7, '2024-01-01 10:00:00', 0),
+    ])
+    file_path = str(tmp_path / name)
+    progress = []
+    assert export_history(source, file_path, chunk_size=1, progress=lambda done, total: progress.append(done)) == 2
+    assert progress[-1] == 2
+
+    assert import_history(target, file_path, chunk_size=1) == (2, 0)
+    rows = {row[0]: row[1:] for row in
+            target.execute('SELECT path, access_count, last_access_time, is_pinned FROM paths')}
+    assert rows == {
+        'C:\\工作\\a': (4, '2024-01-05 10:00:00', 1),
+        'C:\\b,"quoted"': (2, '2024-01-01 10:00:00', 0),
+        'C:\\c': (7, '2024-01-01 10:00:00', 0),
+    }
+
+
+def test_text_progress_writes_percentage():
+    import io
+    from src.file_tracker.history_io import text_progress
+    stream = io.StringIO()
+    progress = text_progress('导出', stream)
+    progress(1, 4)
+    progress(4, 4)
+    assert stream.getvalue() == '\r导出: 25%\r导出: 100%\n'
+
+
+def test_import_normalizes_times_and_skips_bad_records(tmp_path):
+    file_path = tmp_path / 'history.jsonl'
+    file_path.write_text('\n'.join([
+        '{"path": "/iso", "access_count": 2, "last_access_time": "2024-01-02T10:00:00.500"}',
+        '{"path": "/plain", "last_access_time": "2024-01-03 09:00:00"}',
+        '{"path": "/no-time", "access_count": 1, "last_access_time": ""}',
+        '{"path": "/bad-time", "last_access_time": "yesterday"}',
+        '{"path": "/bad-count", "access_count": "many"}',
+        '{"access_count": 3}',
+        '{"path": "/broken", "access_count": ',
+        '{"path": "/negative", "access_count": -4}',
+        '["/not-an-object"]',
+    ]) + '\n', encoding='utf-8')
+    conn = make_db([])
+    assert import_history(conn, str(file_path)) == (3, 6)
+    assert conn.execute('SELECT path, access_count, last_access_time FROM paths ORDER BY id').fetchall() == [
+        ('/iso', 2, '2024-01-02 10:00:00'),
+        ('/plain', 1, '2024-01-03 09:00:00'),
+        ('/no-time', 1, ''),
+    ]
@@ -0,0 +1,67 @@
+import sqlite3
+import time
+import tracemalloc
+
+from src.file_tracker.importer import XbelSource, import_recent
+
+XBEL = '''<?xml version="1.0" encoding="UTF-8"?>
+<xbel version="1.0" xmlns:bookmark="http://www.freedesktop.org/standards/desktop-bookmarks"
+      xmlns:mime="http://www.freedesktop.org/standards/shared-mime-info">
+{}
+</xbel>
+'''
+BOOKMARK = '''<bookmark href="file://{href}" added="{ts}" modified="{ts}" visited="{ts}">
+  <info><metadata owner="http://freedesktop.org"><mime:mime-type type="{mime}"/></metadata></info>
+</bookmark>'''
+
+
+def write_xbel(path, entries):
+    path.write_text(XBEL.format('\n'.join(
+        BOOKMARK.format(href=href, ts=ts, mime=mime) for href, ts, mime in entries)), encoding='utf-8')
+
+
+def make_db():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE paths (id INTEGER PRIMARY KEY, path TEXT UNIQUE, access_count INTEGER DEFAULT 1, '
+                 'last_access_time TEXT, is_pinned INTEGER DEFAULT 0)')
+    return conn
+
+
+def test_import_is_incremental(tmp_path):
+    xbel = tmp_path / 'recently-used.xbel'
+    write_xbel(xbel, [
+        ('/data/my%20proj/notes.txt', '2024-01-01T10:00:00Z', 'text/plain'),
+        ('/data/logs', '2024-01-02T10:00:00Z', 'inode/directory'),
+    ])
+    conn = make_db()
+    source = XbelSource(str(xbel))
+    assert import_recent(conn, [source]) == 2
+    assert dict(conn.execute('SELECT path, access_count FROM paths')) == {'/data/my proj': 1, '/data/logs': 1}
+
+    # 来源未变化时不解析
+    assert import_recent(conn, [source]) == 0
+
+    time.sleep(0.01)
+    write_xbel(xbel, [
+        ('/data/my%20proj/notes.txt', '2024-01-01T10:00:00Z', 'text/plain'),
+        ('/data/logs', '2024-01-02T10:00:00Z', 'inode/directory'),
+        ('/data/logs', '2024-01-03T10:00:00Z', 'inode/directory'),
+    ])
+    assert import_recent(conn, [source]) == 1
+    assert dict(conn.execute('SELECT path, access_count FROM paths')) == {'/data/my proj': 1, '/data/logs': 2}
+
+
+def peak_while_parsing(path, count):
+    write_xbel(path, [(f'/data/d{i}', '2024-01-01T10:00:00Z', 'inode/directory') for i in range(count)])
+    tracemalloc.start()
+    try:
+        assert sum(1 for _ in XbelSource(str(path)).iter_entries(None)) == count
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_parsing_memory_does_not_grow_with_file(tmp_path):
+    small = peak_while_parsing(tmp_path / 'small.xbel', 1000)
+    large = peak_while_parsing(tmp_path / 'large.xbel', 20000)
+    assert large < small * 2, f"{small} -> {large}"
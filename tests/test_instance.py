@@ -0,0 +1,110 @@
+import json
+import os
+import socket
+import threading
+
+from src.file_tracker.instance import InstanceServer, instance_file, notify_running
+
+
+def test_second_launch_and_records_reach_running_instance(tmp_path):
+    path = instance_file(str(tmp_path / 'ft.db'))
+    assert not notify_running(path, 'raise')
+
+    raised = threading.Event()
+    batches = []
+    server = InstanceServer(path, on_raise=raised.set, on_records=batches.append, flush_interval=60)
+    server.start()
+    try:
+        assert notify_running(path, 'raise')
+        assert raised.wait(5)
+
+        # 高频发送的访问按路径合并，只交出一批
+        work = os.path.abspath(str(tmp_path / 'work'))
+        other = os.path.abspath(str(tmp_path / 'other'))
+        for _ in range(50):
+            assert notify_running(path, f"record {work}", f"record {work}")
+        assert notify_running(path, f"record {other}", "record relative/path")
+    finally:
+        rows = server.stop()
+    assert not os.path.exists(path)
+    assert sorted((row[0], row[1]) for row in rows) == [(other, 1), (work, 100)]
+    assert batches == []
+
+
+def test_wrong_token_is_ignored_and_flush_delivers_batches(tmp_path):
+    path = instance_file(str(tmp_path / 'ft.db'))
+    batches = []
+    delivered = threading.Event()
+    server = InstanceServer(path, on_records=lambda rows: (batches.append(rows), delivered.set()), flush_interval=0.05)
+    server.start()
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            port = json.load(f)['port']
+        with socket.create_connection(('127.0.0.1', port)) as sock:
+            sock.sendall('not-the-token\nrecord /intruder\n'.encode('utf-8'))
+        assert notify_running(path, 'record /work')
+        assert delivered.wait(5)
+    finally:
+        server.stop()
+    assert [row[:2] for batch in batches for row in batch] == [(os.path.normpath('/work'), 1)]
+
+
+def test_cli_record_goes_through_running_instance(tmp_path):
+    from src.file_tracker import storage
+    from src.file_tracker.cli import main
+
+    db = str(tmp_path / 'ft.db')
+    server = InstanceServer(instance_file(db), flush_interval=60)
+    server.start()
+    try:
+        assert main(['--db', db, 'record', str(tmp_path)]) == 0
+    finally:
+        rows = server.stop()
+    assert [row[:2] for row in rows] == [(os.path.abspath(str(tmp_path)), 1)]
+    assert storage.connect(db).execute("SELECT COUNT(*) FROM paths").fetchone()[0] == 0
+
+    # 没有运行中的实例时直接写入数据库
+    assert main(['--db', db, 'record', str(tmp_path)]) == 0
+    assert storage.connect(db).execute("SELECT COUNT(*) FROM paths").fetchone()[0] == 1
+
+
+def test_stale_instance_file_is_not_treated_as_running(tmp_path):
+    # 端口被不认识协议的程序占用：能连上但不会确认，不能算作送达
+    path = instance_file(str(tmp_path / 'ft.db'))
+    with socket.socket() as listener:
+        listener.bind(('127.0.0.1', 0))
+        listener.listen(1)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'port': listener.getsockname()[1], 'token': 'stale', 'pid': 0}, f)
+
+        def accept_and_close():
+            conn, _ = listener.accept()
+            conn.recv(1024)
+            conn.close()
+
+        thread = threading.Thread(target=accept_and_close)
+        thread.start()
+        assert not notify_running(path, 'record /work', timeout=2.0)
+        thread.join()
+
+
+def test_cli_writes_go_through_or_wait_for_running_instance(tmp_path, capsys):
+    from src.file_tracker import storage
+    from src.file_tracker.cli import main
+
+    db = str(tmp_path / 'ft.db')
+    storage.record_path(storage.connect(db), str(tmp_path))
+    pins = []
+    server = InstanceServer(instance_file(db), flush_interval=60, on_pin=lambda path, pinned: pins.append((path, pinned)))
+    server.start()
+    try:
+        assert main(['--db', db, 'pin', str(tmp_path) + os.sep]) == 0
+        assert main(['--db', db, 'pin', '--off', str(tmp_path)]) == 0
+        # 界面关闭时会重写整张表，运行期间拒绝直接修改数据库
+        assert main(['--db', db, 'sweep']) == 2
+        assert main(['--db', db, 'sync', str(tmp_path / 'shared')]) == 2
+    finally:
+        server.stop()
+    assert pins == [(str(tmp_path), True), (str(tmp_path), False)]
+    assert '正在运行' in capsys.readouterr().err
+    assert storage.connect(db).execute("SELECT is_pinned FROM paths").fetchall() == [(0,)]
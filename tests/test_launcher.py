@@ -0,0 +1,25 @@
+from src.file_tracker.launcher import FolderLauncher, StubBackend
+
+
+def test_burst_is_collapsed_and_files_open_their_folder(tmp_path):
+    (tmp_path / 'a.txt').write_text('x')
+    backend = StubBackend()
+    launcher = FolderLauncher(backend, dedupe_window=60)
+    futures = [launcher.open(str(tmp_path)) for _ in range(5)]
+    assert futures.count(None) == 4
+    # 文件解析为同一个文件夹，同样被去重
+    assert launcher.open(str(tmp_path / 'a.txt')).result() is None
+    for future in futures:
+        if future:
+            future.result()
+    assert backend.launched == [str(tmp_path)]
+    assert launcher.stats()[0] == 1
+    launcher.shutdown()
+
+
+def test_missing_folder_is_reported(tmp_path):
+    missing = []
+    launcher = FolderLauncher(StubBackend(), on_missing=missing.append)
+    assert launcher.open(str(tmp_path / 'gone')).result() is None
+    assert missing == [str(tmp_path / 'gone')]
+    launcher.shutdown()
@@ -0,0 +1,73 @@
+import threading
+
+from src.file_tracker.metadata import MISSING, MetadataCache, file_type, format_size
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fetch(cache, paths):
+    results = {}
+    done = threading.Event()
+    submitted = cache.request(paths, lambda found: (results.update(found), done.set()))
+    if submitted:
+        assert done.wait(5)
+    return submitted, results
+
+
+def test_only_uncached_paths_are_stated_until_ttl_expires(tmp_path):
+    (tmp_path / 'report.pdf').write_bytes(b'x' * 2048)
+    (tmp_path / 'docs').mkdir()
+    paths = [str(tmp_path / 'report.pdf'), str(tmp_path / 'docs'), str(tmp_path / 'gone')]
+    clock = FakeClock()
+    cache = MetadataCache(ttl=10, clock=clock)
+    try:
+        submitted, results = fetch(cache, paths)
+        assert submitted == 3 and cache.stat_count == 3
+        assert results[paths[0]].size == 2048 and results[paths[1]].is_dir
+        assert results[paths[2]] is MISSING
+
+        # 已缓存的可见行不会再次 stat
+        assert fetch(cache, paths)[0] == 0 and cache.stat_count == 3
+        assert format_size(cache.get(paths[0]).size) == '2.0 KB'
+        assert file_type(paths[0], cache.get(paths[0])) == 'PDF 文件'
+        assert file_type(paths[1], cache.get(paths[1])) == '文件夹'
+
+        clock.now = 11
+        assert cache.get(paths[0]) is None
+        assert fetch(cache, paths[:1])[0] == 1 and cache.stat_count == 4
+    finally:
+        cache.shutdown()
+
+
+def test_invalidate_drops_path_and_descendants(tmp_path):
+    (tmp_path / 'a' / 'b').mkdir(parents=True)
+    (tmp_path / 'ab').mkdir()
+    paths = [str(tmp_path / 'a'), str(tmp_path / 'a' / 'b'), str(tmp_path / 'ab')]
+    cache = MetadataCache()
+    try:
+        fetch(cache, paths)
+        cache.invalidate(str(tmp_path / 'a'))
+        assert cache.get(paths[0]) is None and cache.get(paths[1]) is None
+        assert cache.get(paths[2]) is not None
+        cache.clear()
+        assert cache.get(paths[2]) is None
+    finally:
+        cache.shutdown()
+
+
+def test_scrolling_many_rows_stats_only_requested_ones(tmp_path):
+    # 模拟 10 万行的列表，只请求三屏（每屏 30 行）可见行
+    rows = [str(tmp_path / f'row{i}') for i in range(100000)]
+    cache = MetadataCache()
+    try:
+        for top in (0, 50000, 99970):
+            fetch(cache, rows[top:top + 30])
+        assert cache.stat_count == 90
+    finally:
+        cache.shutdown()
@@ -0,0 +1,35 @@
+from src.file_tracker.path_trie import PathTrie, split_path
+
+
+def test_split_path_handles_both_separators():
+    assert split_path('/home/user/proj') == ('/', 'home', 'user', 'proj')
+    assert split_path('/home//user/proj/') == ('/', 'home', 'user', 'proj')
+
+
+def test_subtree_totals_are_maintained_incrementally():
+    trie = PathTrie()
+    trie.add('/home/user/proj/a', 3, '2024-01-01 10:00:00')
+    trie.add('/home/user/proj/b', 2, '2024-01-02 10:00:00')
+    trie.add('/home/user/docs', 1, '2023-12-31 10:00:00')
+    assert trie.totals('/home/user') == (6, '2024-01-02 10:00:00')
+    assert trie.totals('/home/user/proj') == (5, '2024-01-02 10:00:00')
+
+    assert trie.remove('/home/user/proj/b')
+    assert trie.totals('/home/user/proj') == (3, '2024-01-01 10:00:00')
+    assert trie.totals('/home/user') == (4, '2024-01-01 10:00:00')
+    assert trie.node('/home/user/proj/b') is None
+    assert len(trie) == 2
+
+
+def test_move_preserves_counts_and_group_by_parent():
+    trie = PathTrie.from_rows([
+        ('/repo/build', 4, '2024-01-01 10:00:00'),
+        ('/repo/build/logs', 2, '2024-01-03 10:00:00'),
+        ('/other/x', 1, '2024-01-02 10:00:00'),
+    ])
+    assert trie.move('/repo/build', '/repo/out') == 2
+    assert '/repo/out/logs' in trie and '/repo/build' not in trie
+    assert trie.totals('/repo/out') == (6, '2024-01-03 10:00:00')
+
+    groups = trie.group_by_parent(['/repo/out', '/repo/out/logs', '/other/x'])
+    assert groups[0] == ('/repo', 6, '2024-01-03 10:00:00')
@@ -0,0 +1,45 @@
+from datetime import datetime
+
+from src.file_tracker.retention import Evictor, RetentionPolicy, evict_batch
+from src.file_tracker.storage import connect, merge_paths
+
+NOW = datetime(2024, 6, 1)
+
+
+def test_age_and_row_limits_spare_pinned_and_frequent_paths(tmp_path):
+    conn = connect(str(tmp_path / 'ft.db'))
+    merge_paths(conn, [
+        ('/old-rare', 1, '2022-01-01 00:00:00', 0),
+        ('/old-frequent', 9, '2022-01-01 00:00:00', 0),
+        ('/old-pinned', 1, '2022-01-01 00:00:00', 1),
+        ('/cold', 1, '2024-05-01 00:00:00', 0),
+        ('/warm', 2, '2024-05-01 00:00:00', 0),
+        ('/hot', 7, '2024-05-31 00:00:00', 0),
+    ])
+    policy = RetentionPolicy(max_rows=3, max_age_days=365, min_count=5)
+    assert evict_batch(conn, policy, now=NOW) == ['/old-rare']
+    assert evict_batch(conn, policy, batch_size=1, now=NOW) == ['/cold']
+    assert evict_batch(conn, policy, now=NOW) == ['/warm']
+    assert evict_batch(conn, policy, now=NOW) == []
+    assert {row[0] for row in conn.execute('SELECT path FROM paths')} == {'/old-frequent', '/old-pinned', '/hot'}
+
+
+def test_evictor_works_in_batches(tmp_path):
+    db = str(tmp_path / 'ft.db')
+    conn = connect(db)
+    merge_paths(conn, [(f'/p{i}', 1, '2024-05-01 00:00:00', 0) for i in range(25)])
+    batches = []
+    evictor = Evictor(db, RetentionPolicy(max_rows=5, max_age_days=None), on_evicted=batches.append,
+                      batch_size=10, pause=0)
+    assert evictor.run_once() == 20
+    assert [len(batch) for batch in batches] == [10, 10]
+    assert conn.execute('SELECT COUNT(*) FROM paths').fetchone()[0] == 5
+
+
+def test_default_policy_keeps_everything(tmp_path):
+    conn = connect(str(tmp_path / 'ft.db'))
+    merge_paths(conn, [(f'/p{i}', 1, '2000-01-01 00:00:00', 0) for i in range(6000)])
+    policy = RetentionPolicy.from_config({})
+    assert not policy.enabled
+    assert evict_batch(conn, policy, now=NOW) == []
+    assert RetentionPolicy.from_config({'max_rows': 10}).enabled
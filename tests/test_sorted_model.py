@@ -0,0 +1,32 @@
+import random
+
+from src.file_tracker.sorted_model import SortedPathModel
+
+
+def test_incremental_updates_match_full_sort():
+    rng = random.Random(7)
+    model = SortedPathModel()
+    model.load([(f'/p{i}', rng.randint(1, 5), float(i)) for i in range(50)])
+    for step in range(500):
+        path = f'/p{rng.randrange(60)}'
+        if rng.random() < 0.1:
+            row = model.remove(path)
+            assert path not in model and (row == -1 or row <= len(model))
+            continue
+        count = model.records.get(path, (0, 0))[0] + 1
+        expected = model.position_for(path, count, 100.0 + step)
+        assert model.update(path, count, 100.0 + step) == expected
+        assert model.path_at(expected[1]) == path
+
+        reference = SortedPathModel()
+        reference.load((p,) + r for p, r in model.records.items())
+        assert model.keys == reference.keys
+
+
+def test_order_by_time():
+    model = SortedPathModel(order_by='last_access_time')
+    model.load([('/a', 9, 1.0), ('/b', 1, 2.0)])
+    assert [model.path_at(i) for i in range(2)] == ['/b', '/a']
+    assert model.update('/a', 10, 3.0) == (1, 0)
+    model.set_order('access_count')
+    assert model.record_at(0) == ('/a', 10, 3.0)
@@ -0,0 +1,80 @@
+import queue
+import threading
+import time
+
+from src.file_tracker.stall import StallMonitor, is_enabled
+
+
+class FakeLoop:
+    """在单独线程中依次执行投递的回调，模拟界面事件循环"""
+
+    def __init__(self):
+        self.calls = queue.Queue()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while True:
+            func = self.calls.get()
+            if func is None:
+                return
+            func()
+
+    def post(self, func):
+        self.calls.put(func)
+
+    def close(self):
+        self.calls.put(None)
+        self.thread.join()
+
+
+def slow_commit():
+    time.sleep(0.4)
+
+
+def test_stall_is_sampled_and_reported(tmp_path):
+    loop = FakeLoop()
+    report = tmp_path / 'stalls.log'
+    monitor = StallMonitor(loop.post, str(report), threshold=0.1, interval=0.02, thread_id=loop.thread.ident)
+    monitor.start()
+    try:
+        time.sleep(0.1)
+        loop.post(slow_commit)
+        deadline = time.monotonic() + 5
+        while monitor.stalls == 0 and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        monitor.stop()
+        loop.close()
+    assert monitor.stalls == 1
+    (frame, _), = monitor.top_frames.most_common(1)
+    assert frame[2] == 'slow_commit'
+    text = report.read_text(encoding='utf-8')
+    assert '事件循环卡顿' in text and 'in slow_commit' in text and '累计最常见的卡顿位置' in text
+
+
+def test_no_report_without_stalls(tmp_path):
+    loop = FakeLoop()
+    report = tmp_path / 'stalls.log'
+    posted = []
+
+    def post(func):
+        posted.append(func)
+        loop.post(func)
+
+    monitor = StallMonitor(post, str(report), threshold=0.2, interval=0.01, thread_id=loop.thread.ident)
+    monitor.start()
+    time.sleep(0.2)
+    monitor.stop()
+    loop.close()
+    assert monitor.stalls == 0 and len(posted) > 3
+    assert report.read_text(encoding='utf-8') == ''
+
+
+def test_watchdog_switch_is_parsed_explicitly():
+    assert is_enabled('1') and is_enabled(' True ') and is_enabled('yes')
+    assert not is_enabled('0') and not is_enabled('false') and not is_enabled('no')
+    # 环境变量优先于配置项；未设置或为空时才看配置
+    assert not is_enabled('0', True)
+    assert is_enabled(None, True) and is_enabled('', True)
+    assert not is_enabled(None)
@@ -0,0 +1,151 @@
+import os
+import time
+
+from src.file_tracker import storage
+from src.file_tracker.sync import HistorySync
+
+
+def rows(conn):
+    return conn.execute("SELECT path, access_count, last_access_time, is_pinned FROM paths ORDER BY path").fetchall()
+
+
+def test_counters_add_up_and_pins_use_last_writer(tmp_path):
+    shared = str(tmp_path / 'shared')
+    a = storage.connect(str(tmp_path / 'a.db'))
+    b = storage.connect(str(tmp_path / 'b.db'))
+    storage.upsert_paths(a, [('/work', 3, '2024-01-01 09:00:00'), ('/a-only', 1, '2024-01-01 09:00:00')])
+    storage.upsert_paths(b, [('/work', 2, '2024-01-02 09:00:00')])
+    sync_a, sync_b = HistorySync(a, shared), HistorySync(b, shared)
+    assert sync_a.device != sync_b.device
+
+    sync_a.sync()
+    sync_b.sync()
+    sync_a.sync()
+    assert rows(a) == rows(b) == [('/a-only', 1, '2024-01-01 09:00:00', 0), ('/work', 5, '2024-01-02 09:00:00', 0)]
+
+    # 两台设备各自新增访问，并修改置顶状态；较晚的修改获胜
+    storage.record_path(a, '/work', '2024-01-03 09:00:00')
+    storage.set_pinned(a, '/work', True)
+    assert sync_a.sync(now=100.0) == (2, 0)
+    storage.record_path(b, '/work', '2024-01-03 10:00:00')
+    storage.set_pinned(b, '/a-only', True)
+    assert sync_b.sync(now=200.0) == (2, 2)
+    assert rows(b)[1] == ('/work', 7, '2024-01-03 10:00:00', 1)
+    storage.set_pinned(b, '/work', False)
+    assert sync_b.sync(now=300.0) == (1, 0)
+    sync_a.sync(now=400.0)
+    assert rows(a) == rows(b) == [('/a-only', 1, '2024-01-01 09:00:00', 1), ('/work', 7, '2024-01-03 10:00:00', 0)]
+
+    # 没有变化时不再写出或合并任何条目
+    assert sync_a.sync() == (0, 0)
+    assert sync_b.sync() == (0, 0)
+
+
+def test_only_deltas_are_exchanged_and_gaps_wait(tmp_path):
+    shared = str(tmp_path / 'shared')
+    a = storage.connect(str(tmp_path / 'a.db'))
+    b = storage.connect(str(tmp_path / 'b.db'))
+    sync_a, sync_b = HistorySync(a, shared), HistorySync(b, shared)
+    storage.record_path(a, '/one', '2024-01-01 09:00:00')
+    sync_a.sync()
+    storage.record_path(a, '/two', '2024-01-01 09:00:00')
+    sync_a.sync()
+    files = sorted(os.listdir(os.path.join(shared, sync_a.device)))
+    assert files == ['0000000001-0000000001.jsonl', '0000000002-0000000002.jsonl']
+
+    # 第一个增量尚未同步到这台设备时，后面的增量暂不合并
+    first = os.path.join(shared, sync_a.device, files[0])
+    os.rename(first, first + '.hidden')
+    assert sync_b.sync() == (0, 0)
+    os.rename(first + '.hidden', first)
+    assert sync_b.sync() == (0, 2)
+    assert [row[0] for row in rows(b)] == ['/one', '/two']
+
+
+def test_merging_large_histories_is_fast(tmp_path):
+    shared = str(tmp_path / 'shared')
+    a = storage.connect(str(tmp_path / 'a.db'))
+    b = storage.connect(str(tmp_path / 'b.db'))
+    storage.upsert_paths(a, ((f'/p/{i}', 2, '2024-01-01 00:00:00') for i in range(100000)), 5000)
+    storage.upsert_paths(b, ((f'/p/{i}', 1, '2024-02-01 00:00:00') for i in range(0, 200000, 2)), 5000)
+    HistorySync(a, shared).sync()
+    start = time.perf_counter()
+    assert HistorySync(b, shared).sync() == (100000, 100000)
+    assert time.perf_counter() - start < 15
+    assert b.execute("SELECT COUNT(*), SUM(access_count) FROM paths").fetchone() == (150000, 300000)
+
+
+def test_local_counter_survives_delete_and_exports_time_only_changes(tmp_path):
+    shared = str(tmp_path / 'shared')
+    a = storage.connect(str(tmp_path / 'a.db'))
+    b = storage.connect(str(tmp_path / 'b.db'))
+    sync_a, sync_b = HistorySync(a, shared), HistorySync(b, shared)
+    storage.upsert_paths(a, [('/work', 3, '2024-01-01 09:00:00')])
+    sync_a.sync()
+    sync_b.sync()
+
+    # 本机删除后再次访问：新的访问仍要计入并同步，总数不能回退
+    storage.delete_paths(a, ['/work'])
+    storage.record_path(a, '/work', '2024-01-02 09:00:00')
+    assert sync_a.sync() == (1, 0)
+    sync_b.sync()
+    assert rows(b) == [('/work', 4, '2024-01-02 09:00:00', 0)]
+
+    # 只推进了访问时间的写入也要同步
+    storage.upsert_paths(a, [('/work', 0, '2024-01-03 09:00:00')])
+    assert sync_a.sync() == (1, 0)
+    sync_b.sync()
+    assert rows(b) == [('/work', 4, '2024-01-03 09:00:00', 0)]
+
+    # 合并进来的其他设备计数不会被当作本机访问再次写出
+    storage.record_path(b, '/work', '2024-01-04 09:00:00')
+    sync_b.sync()
+    assert sync_a.sync() == (0, 1)
+    assert sync_a.sync() == (0, 0)
+    assert rows(a) == [('/work', 5, '2024-01-04 09:00:00', 0)]
+
+
+def test_remote_spellings_fold_into_existing_rows(tmp_path):
+    shared = tmp_path / 'shared'
+    b = storage.connect(str(tmp_path / 'b.db'))
+    storage.record_path(b, '/data/proj', '2024-01-01 09:00:00')
+    sync_b = HistorySync(b, str(shared))
+    sync_b.sync()
+    # 旧版本的设备写出的增量中路径带有末尾分隔符
+    (shared / 'peer').mkdir()
+    (shared / 'peer' / '0000000001-0000000001.jsonl').write_text(
+        '["c", "/data/proj/", 2, "2024-01-02 09:00:00", 1]\n', encoding='utf-8')
+    assert sync_b.sync() == (0, 1)
+    assert rows(b) == [('/data/proj', 3, '2024-01-02 09:00:00', 0)]
+
+
+def test_pin_stamps_come_from_the_change_and_deletions_stick(tmp_path):
+    shared = str(tmp_path / 'shared')
+    a = storage.connect(str(tmp_path / 'a.db'))
+    b = storage.connect(str(tmp_path / 'b.db'))
+    sync_a, sync_b = HistorySync(a, shared), HistorySync(b, shared)
+    storage.upsert_paths(a, [('/work', 1, '2024-01-01 09:00:00'), ('/old', 1, '2024-01-01 09:00:00')])
+    sync_a.sync()
+    sync_b.sync()
+
+    # A 较早置顶但较晚同步，B 之后取消置顶：B 的修改更新，应当获胜
+    storage.set_pinned(a, '/work', True, now=100.0)
+    storage.set_pinned(b, '/work', True, now=150.0)
+    sync_b.sync(now=150.0)
+    storage.set_pinned(b, '/work', False, now=200.0)
+    sync_b.sync(now=200.0)
+    sync_a.sync(now=1000.0)
+    sync_b.sync(now=1000.0)
+    assert a.execute("SELECT is_pinned FROM paths WHERE path = '/work'").fetchone() == (0,)
+    assert b.execute("SELECT is_pinned FROM paths WHERE path = '/work'").fetchone() == (0,)
+
+    # A 删除 /old 后，B 早于删除时间的访问不会让它重新出现，之后的新访问才会
+    storage.delete_paths(a, ['/old'])
+    storage.upsert_paths(b, [('/old', 1, '2024-01-02 09:00:00')])
+    sync_b.sync()
+    sync_a.sync()
+    assert [row[0] for row in rows(a)] == ['/work']
+    storage.record_path(b, '/old', '2999-01-01 00:00:00')
+    sync_b.sync()
+    sync_a.sync()
+    assert rows(a)[0] == ('/old', 3, '2999-01-01 00:00:00', 0)
@@ -0,0 +1,101 @@
+import shutil
+
+from src.file_tracker import storage
+from src.file_tracker.cli import main
+from src.file_tracker.trace import TraceRecorder, read_trace, replay, table_digest
+
+
+def record_session(db, trace_file):
+    conn = storage.connect(db)
+    storage.record_path(conn, '/seed', '2024-01-01 08:00:00')
+    snapshot = db + '.start'
+    shutil.copyfile(db, snapshot)
+
+    trace = TraceRecorder(trace_file, conn)
+    for path, now in (('/a', '2024-01-02 09:00:00'), ('/b', '2024-01-02 09:00:05'), ('/a', '2024-01-02 09:01:00')):
+        trace.log('record', path, now)
+        storage.record_path(conn, path, now)
+        trace.log('open', path)
+    trace.log('pin', '/b')
+    storage.set_pinned(conn, '/b')
+    trace.log('sort', 2, True)
+    trace.log('resize', 800, 600)
+    trace.log('rename', '/a', '/c')
+    storage.rename_path_prefix(conn, '/a', '/c')
+    trace.log('delete', '/seed')
+    storage.delete_paths(conn, ['/seed'])
+    trace.close(conn)
+    final = table_digest(conn)
+    conn.close()
+    return snapshot, final
+
+
+def test_replay_reproduces_final_state(tmp_path):
+    snapshot, final = record_session(str(tmp_path / 'ft.db'), str(tmp_path / 'trace.jsonl'))
+    header, events, footer = read_trace(str(tmp_path / 'trace.jsonl'))
+    assert header['version'] == 1 and footer['final_digest'] == final
+    assert [event[1] for event in events][:3] == ['record', 'open', 'record']
+
+    conn = storage.connect(snapshot)
+    replayer, initial_ok, final_ok = replay(str(tmp_path / 'trace.jsonl'), conn)
+    assert initial_ok and final_ok
+    assert table_digest(conn) == final
+    report = replayer.report()
+    assert report['record'][0] == 3 and report['open'][0] == 3
+    assert replayer.model.order_by == 'last_access_time'
+    assert replayer.model.path_at(0) == '/c'
+    conn.close()
+
+
+def test_replay_command_reports_divergence(tmp_path, capsys):
+    snapshot, _ = record_session(str(tmp_path / 'ft.db'), str(tmp_path / 'trace.jsonl'))
+    assert main(['--db', snapshot, 'replay', str(tmp_path / 'trace.jsonl')]) == 0
+    out = capsys.readouterr().out
+    assert 'record' in out and '最终状态一致' in out
+
+    # 在已经回放过的数据库上再次回放，最终状态必然不同
+    assert main(['--db', snapshot, 'replay', str(tmp_path / 'trace.jsonl')]) == 1
+    assert '初始状态' in capsys.readouterr().err
+
+
+def test_sessions_are_appended_and_imports_replayed(tmp_path):
+    from src.file_tracker.history_io import export_history, import_history
+    from src.file_tracker.trace import read_sessions
+
+    db, trace_file = str(tmp_path / 'ft.db'), str(tmp_path / 'trace.jsonl')
+    snapshot, _ = record_session(db, trace_file)
+    source = storage.connect(str(tmp_path / 'other.db'))
+    storage.record_path(source, '/imported', '2024-01-03 00:00:00')
+    export_history(source, str(tmp_path / 'history.jsonl'))
+
+    # 第二次启动接着录制，不覆盖第一段
+    conn = storage.connect(db)
+    trace = TraceRecorder(trace_file, conn)
+    import_history(conn, str(tmp_path / 'history.jsonl'))
+    trace.checkpoint('import', conn, str(tmp_path / 'history.jsonl'))
+    trace.log('record', '/b', '2024-01-04 00:00:00')
+    storage.record_path(conn, '/b', '2024-01-04 00:00:00')
+    trace.close(conn)
+    final = table_digest(conn)
+    conn.close()
+    assert len(read_sessions(trace_file)) == 2
+
+    header, events, footer = read_trace(trace_file)
+    assert footer['final_digest'] == final
+    assert [event[1] for event in events][-3:] == ['session', 'import', 'record']
+    assert [event[0] for event in events] == sorted(event[0] for event in events)
+
+    conn = storage.connect(snapshot)
+    replayer, initial_ok, final_ok = replay(trace_file, conn)
+    assert initial_ok and final_ok
+    assert replayer.checkpoints == [('session', True), ('import', True)]
+    conn.close()
+
+
+def test_large_trace_is_rotated(tmp_path):
+    conn = storage.connect(str(tmp_path / 'ft.db'))
+    trace_file = tmp_path / 'trace.jsonl'
+    trace_file.write_text('{"version":1}\n' * 100, encoding='utf-8')
+    TraceRecorder(str(trace_file), conn, max_bytes=1000).close(conn)
+    assert (tmp_path / 'trace.jsonl.1').stat().st_size > 1000
+    assert len(trace_file.read_text(encoding='utf-8').splitlines()) == 2
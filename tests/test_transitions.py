@@ -0,0 +1,36 @@
+import sqlite3
+
+from src.file_tracker.transitions import TransitionModel
+
+
+def test_suggestions_follow_recent_navigation_chains():
+    model = TransitionModel(decay=0.5, top_k=2)
+    for _ in range(3):
+        for path in ('/repo', '/repo/build', '/repo/logs'):
+            model.observe(path)
+    assert model.suggest('/repo') == ['/repo/build']
+    assert model.suggest() == ['/repo']
+
+    # 衰减使最近的习惯很快压过旧习惯
+    for path in ('/repo', '/docs', '/repo', '/docs'):
+        model.observe(path)
+    assert model.suggest('/repo') == ['/docs', '/repo/build']
+
+    model.forget('/docs')
+    assert model.suggest('/repo') == ['/repo/build']
+
+
+def test_top_k_is_bounded_and_survives_renormalize_and_reload():
+    model = TransitionModel(decay=0.9, top_k=3)
+    model.RENORMALIZE_AT = 10.0
+    for i in range(10):
+        model.observe('/src')
+        model.observe(f'/dst{i % 4}')
+    assert len(model.suggest('/src')) == 3
+    expected = model.suggest('/src')
+
+    conn = sqlite3.connect(':memory:')
+    model.save(conn)
+    reloaded = TransitionModel(decay=0.9, top_k=3)
+    reloaded.load(conn)
+    assert reloaded.suggest('/src') == expected
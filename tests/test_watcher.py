@@ -0,0 +1,118 @@
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import pytest
+
+from src.file_tracker.storage import rename_path_prefix
+from src.file_tracker.watcher import CREATED, DELETED, MOVED_FROM, MOVED_TO, PathWatcher, default_backend
+
+
+def test_coalesce_pairs_renames_and_cancels_replaced_entries():
+    renames, deleted, restored = PathWatcher.coalesce([
+        (MOVED_FROM, '/a/old', 7),
+        (MOVED_TO, '/a/new', 7),
+        (DELETED, '/a/tmp', 0),
+        (CREATED, '/a/tmp', 0),
+        (MOVED_FROM, '/a/gone', 9),
+        (CREATED, '/a/back', 0),
+    ])
+    assert renames == [('/a/old', '/a/new')]
+    assert deleted == ['/a/gone']
+    assert restored == ['/a/back']
+
+
+def test_rename_path_prefix_preserves_counts_and_merges():
+    conn = sqlite3.connect(':memory:')
+    conn.execute('CREATE TABLE paths (id INTEGER PRIMARY KEY, path TEXT UNIQUE, access_count INTEGER DEFAULT 1, '
+                 'last_access_time TEXT, is_pinned INTEGER DEFAULT 0)')
+    conn.executemany('INSERT INTO paths (path, access_count, last_access_time, is_pinned) VALUES (?, ?, ?, ?)', [
+        ('/p/old', 3, '2024-01-01 00:00:00', 1),
+        ('/p/old/sub', 2, '2024-01-02 00:00:00', 0),
+        ('/p/older', 5, '2024-01-01 00:00:00', 0),
+        ('/p/new/sub', 1, '2024-01-03 00:00:00', 0),
+    ])
+    rename_path_prefix(conn, '/p/old', '/p/new')
+    rows = dict((path, (count, last, pinned)) for path, count, last, pinned in
+                conn.execute('SELECT path, access_count, last_access_time, is_pinned FROM paths'))
+    assert rows == {
+        '/p/new': (3, '2024-01-01 00:00:00', 1),
+        '/p/new/sub': (3, '2024-01-03 00:00:00', 0),
+        '/p/older': (5, '2024-01-01 00:00:00', 0),
+    }
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify 仅在 Linux 上可用')
+def test_inotify_watcher_reports_rename_of_tracked_path(tmp_path):
+    tracked = tmp_path / 'proj'
+    tracked.mkdir()
+    (tmp_path / 'unrelated').mkdir()
+    changes = []
+    done = threading.Event()
+
+    def on_changes(renames, deleted, restored):
+        changes.append((renames, deleted, restored))
+        done.set()
+
+    watcher = PathWatcher(on_changes, backend=default_backend(), max_watches=4, debounce=0.05)
+    watcher.sync([(str(tracked), 3)])
+    assert watcher.watched_directories() == [str(tmp_path)]
+    watcher.start()
+    try:
+        os.rename(tmp_path / 'unrelated', tmp_path / 'other')
+        os.rename(tracked, tmp_path / 'renamed')
+        assert done.wait(5)
+    finally:
+        watcher.stop()
+    assert changes == [([(str(tracked), str(tmp_path / 'renamed'))], [], [])]
+
+
+class ChurningBackend:
+    """每次读取都返回新事件，模拟持续变化的目录"""
+
+    def __init__(self):
+        self.reads = 0
+
+    def add_watch(self, directory):
+        return directory
+
+    def remove_watch(self, handle):
+        pass
+
+    def read_events(self, timeout):
+        self.reads += 1
+        time.sleep(0.005)
+        return [(CREATED, f'/parent/tmp{self.reads}', 0)]
+
+    def close(self):
+        pass
+
+
+def test_constant_churn_still_flushes():
+    flushed = threading.Event()
+    watcher = PathWatcher(lambda *changes: flushed.set(), backend=ChurningBackend(), debounce=0.05, max_delay=0.2)
+    watcher.sync([('/parent/tmp3', 1)])
+    batches = []
+    original = watcher._flush
+    watcher._flush = lambda events: (batches.append(len(events)), original(events))
+    watcher.start()
+    try:
+        assert flushed.wait(5)
+    finally:
+        watcher.stop()
+    assert batches and batches[0] < 200
+
+    # 积压达到上限时立即处理
+    capped = PathWatcher(lambda *changes: None, backend=ChurningBackend(), debounce=60, max_delay=60, max_pending=10)
+    sizes = []
+    capped._flush = lambda events: sizes.append(len(events))
+    capped.start()
+    try:
+        deadline = time.monotonic() + 5
+        while not sizes and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        capped.stop()
+    assert sizes[0] == 10